@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
+from core.caching import bump_version
 from .models import Category, Blog, BlogImage, BlogComment
+from .search import index_blogs
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -52,7 +54,11 @@ class BlogAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('author', 'category')
 
     def approve_blogs(self, request, queryset):
+        # update سیگنال save را اجرا نمی‌کند، پس نمایه جستجو و کش شمارش‌ها جداگانه به‌روز می‌شوند
+        blog_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_approved=True)
+        index_blogs(Blog.objects.filter(pk__in=blog_ids).select_related('category'))
+        bump_version('blogs')
         self.message_user(request, _(f"{updated} وبلاگ با موفقیت تأیید شدند."))
     approve_blogs.short_description = _("تأیید وبلاگ‌های انتخاب‌شده")
 
@@ -1,12 +1,20 @@
 from django import forms
 from django.utils.translation import gettext_lazy as _
+from core.caching import CachedChoices
 from .models import Blog, BlogImage, BlogComment, Category
 
+category_choices = CachedChoices(
+    'category_choices',
+    lambda: Category.objects.order_by('pk').values_list('pk', 'name'),
+    models=[Category],
+)
+
 class BlogRegisterForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['category'].queryset = Category.objects.all()
-        self.fields['category'].label_from_instance = lambda obj: obj.name
+        # گزینه‌ها از حافظه پروسه؛ پایگاه داده فقط هنگام اعتبارسنجی خوانده می‌شود
+        self.fields['category'].choices = [('', '---------')] + category_choices()
 
     class Meta:
         model = Blog
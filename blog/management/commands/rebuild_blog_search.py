@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from blog.search import rebuild_index
+from core.search import fts_available
+
+
+class Command(BaseCommand):
+    help = "ساخت دوباره نمایه جستجوی تمام‌متن (FTS5) وبلاگ‌های تأییدشده"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            self.stdout.write(self.style.WARNING("جستجوی FTS5 فقط روی SQLite فعال است."))
+            return
+        total = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{total} وبلاگ نمایه شد."))
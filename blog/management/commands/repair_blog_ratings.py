@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog.ratings import repair_ratings
+
+
+class Command(BaseCommand):
+    help = "محاسبه دوباره ستون‌های خلاصه امتیاز وبلاگ‌ها از روی نظرها"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        fixed = repair_ratings(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"خلاصه امتیاز {fixed} وبلاگ اصلاح شد."))
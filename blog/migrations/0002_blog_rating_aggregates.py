@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:15
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def fill_rating_aggregates(apps, schema_editor):
+    """پر کردن ستون‌های خلاصه امتیاز از روی نظرهای موجود"""
+    BlogComment = apps.get_model("blog", "BlogComment")
+    Blog = apps.get_model("blog", "Blog")
+    buckets = {
+        "rating_1": Count("pk", filter=Q(rating__lt=1.5)),
+        "rating_2": Count("pk", filter=Q(rating__gte=1.5, rating__lt=2.5)),
+        "rating_3": Count("pk", filter=Q(rating__gte=2.5, rating__lt=3.5)),
+        "rating_4": Count("pk", filter=Q(rating__gte=3.5, rating__lt=4.5)),
+        "rating_5": Count("pk", filter=Q(rating__gte=4.5)),
+    }
+    rows = (
+        BlogComment.objects.order_by()
+        .values("blog_id")
+        .annotate(rating_sum=Sum("rating"), rating_count=Count("pk"), **buckets)
+    )
+    for row in rows:
+        Blog.objects.filter(pk=row.pop("blog_id")).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blog",
+            name="rating_1",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="1 Star Ratings"
+            ),
+        ),
+        migrations.AddField(
+            model_name="blog",
+            name="rating_2",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="2 Star Ratings"
+            ),
+        ),
+        migrations.AddField(
+            model_name="blog",
+            name="rating_3",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="3 Star Ratings"
+            ),
+        ),
+        migrations.AddField(
+            model_name="blog",
+            name="rating_4",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="4 Star Ratings"
+            ),
+        ),
+        migrations.AddField(
+            model_name="blog",
+            name="rating_5",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="5 Star Ratings"
+            ),
+        ),
+        migrations.AddField(
+            model_name="blog",
+            name="rating_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Rating Count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="blog",
+            name="rating_sum",
+            field=models.FloatField(
+                default=0, editable=False, verbose_name="Rating Sum"
+            ),
+        ),
+        migrations.RunPython(fill_rating_aggregates, migrations.RunPython.noop),
+    ]
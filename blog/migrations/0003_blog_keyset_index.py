@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0002_blog_rating_aggregates"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="blog",
+            index=models.Index(
+                fields=["is_approved", "created_at", "id"],
+                name="blog_blog_is_appr_c182cb_idx",
+            ),
+        ),
+    ]
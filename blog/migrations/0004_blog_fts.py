@@ -0,0 +1,45 @@
+from django.db import migrations
+
+from core.search import normalize_persian
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS blog_blog_fts "
+        "USING fts5(title, content, category, tokenize='unicode61 remove_diacritics 2')"
+    )
+    Blog = apps.get_model("blog", "Blog")
+    rows = [
+        (
+            blog.pk,
+            normalize_persian(blog.title),
+            normalize_persian(blog.content),
+            normalize_persian(blog.category.name if blog.category else ""),
+        )
+        for blog in Blog.objects.filter(is_approved=True).select_related("category")
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO blog_blog_fts (rowid, title, content, category) "
+            "VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS blog_blog_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0003_blog_keyset_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -1,8 +1,16 @@
-from django.db import models
+import re
+import secrets
+
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Length
 from django.utils.translation import gettext_lazy as _
 from django.utils.text import slugify
 from django.contrib.auth import get_user_model
 
+# طول پایه اسلاگ تا برای پسوند در max_length جا بماند
+SLUG_BASE_LENGTH = 190
+SLUG_ATTEMPTS = 3
+
 class Category(models.Model):
     name = models.CharField(max_length=100, verbose_name=_('Name'))
     slug = models.SlugField(max_length=100, unique=True, verbose_name=_('Slug'))
@@ -38,25 +46,80 @@ class Blog(models.Model):
     is_approved = models.BooleanField(default=False, verbose_name=_('Is Approved'))
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created At'))
 
+    # خلاصه امتیاز نظرها؛ با سیگنال‌های BlogComment و دستور repair_blog_ratings نگهداری می‌شود
+    rating_sum = models.FloatField(default=0, editable=False, verbose_name=_('Rating Sum'))
+    rating_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('Rating Count'))
+    rating_1 = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('1 Star Ratings'))
+    rating_2 = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('2 Star Ratings'))
+    rating_3 = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('3 Star Ratings'))
+    rating_4 = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('4 Star Ratings'))
+    rating_5 = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('5 Star Ratings'))
+
     class Meta:
         verbose_name = _('Blog')
         verbose_name_plural = _('Blogs')
+        indexes = [
+            models.Index(fields=['is_approved', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def avg_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else 0.0
+
+    @property
+    def rating_percentages(self):
+        """درصد نظرهای هر ستاره با کلید رشته‌ای '1' تا '5'"""
+        return {
+            str(star): round(getattr(self, f'rating_{star}') / self.rating_count * 100, 1) if self.rating_count else 0
+            for star in range(1, 6)
+        }
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title, allow_unicode=True)
-            if not base_slug:
-                base_slug = f"blog-{Blog.objects.count() + 1}"
-            unique_slug = base_slug
-            counter = 1
-            while Blog.objects.filter(slug=unique_slug).exclude(id=self.id).exists():
-                unique_slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = unique_slug
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        base_slug = slugify(self.title, allow_unicode=True)[:SLUG_BASE_LENGTH].strip('-') or 'blog'
+        for attempt in range(SLUG_ATTEMPTS):
+            # اگر رقابت هم‌زمان ادامه داشت، آخرین تلاش با پسوند تصادفی انجام می‌شود
+            if attempt < SLUG_ATTEMPTS - 1:
+                self.slug = self._next_slug(base_slug)
+            else:
+                self.slug = f"{base_slug}-{secrets.token_hex(3)}"
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if not Blog.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
+                    self.slug = ''
+                    raise
+        self.slug = ''
+        raise IntegrityError(f"could not allocate a unique slug for {base_slug!r}")
+
+    @classmethod
+    def _next_slug(cls, base_slug):
+        """اسلاگ آزاد بعدی با یک کوئری روی پیشوند
+
+        بزرگ‌ترین پسوند عددی موجود (base، base-1، base-2، ...) با مرتب‌سازی بر
+        اساس طول و سپس مقدار پیدا می‌شود؛ شرط بازه‌ای از ایندکس یکتای slug
+        استفاده می‌کند.
+        """
+        last = (
+            cls.objects.filter(
+                slug__gte=base_slug,
+                slug__lt=base_slug + '\uffff',
+                slug__regex=rf'^{re.escape(base_slug)}(-[0-9]+)?$',
+            )
+            .order_by(Length('slug').desc(), '-slug')
+            .values_list('slug', flat=True)
+            .first()
+        )
+        if last is None:
+            return base_slug
+        suffix = last[len(base_slug) + 1:]
+        return f"{base_slug}-{int(suffix) + 1 if suffix else 1}"
 
 class BlogImage(models.Model):
     blog = models.ForeignKey(Blog, on_delete=models.CASCADE, related_name='images', verbose_name=_('Blog'))
@@ -0,0 +1,56 @@
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import Blog, BlogComment
+
+STARS = range(1, 6)
+
+
+def star_bucket(rating):
+    """ستون هیستوگرام یک امتیاز؛ امتیاز در بازه [i-0.5, i+0.5) در ستاره i شمرده می‌شود"""
+    return min(5, max(1, int(rating + 0.5)))
+
+
+def apply_rating(blog_id, rating, sign=1):
+    """افزودن (sign=1) یا کم کردن (sign=-1) یک امتیاز از ستون‌های تجمیعی وبلاگ با F()"""
+    field = f'rating_{star_bucket(rating)}'
+    Blog.objects.filter(pk=blog_id).update(**{
+        'rating_sum': F('rating_sum') + sign * rating,
+        'rating_count': F('rating_count') + sign,
+        field: F(field) + sign,
+    })
+
+
+def rating_aggregates():
+    """محاسبه دوباره ستون‌های امتیاز همه وبلاگ‌ها با یک کوئری گروه‌بندی‌شده"""
+    buckets = {
+        f'rating_{star}': Count('pk', filter=Q(rating__gte=star - 0.5, rating__lt=star + 0.5))
+        for star in STARS
+    }
+    # مثل star_bucket، ستاره‌های ۱ و ۵ امتیازهای خارج از بازه را هم می‌شمارند
+    buckets['rating_1'] = Count('pk', filter=Q(rating__lt=1.5))
+    buckets['rating_5'] = Count('pk', filter=Q(rating__gte=4.5))
+    return (
+        BlogComment.objects.order_by()
+        .values('blog_id')
+        .annotate(rating_sum=Sum('rating'), rating_count=Count('pk'), **buckets)
+    )
+
+
+def repair_ratings(batch_size=500):
+    """بازسازی ستون‌های تجمیعی امتیاز از روی نظرها؛ تعداد وبلاگ‌های اصلاح‌شده را برمی‌گرداند"""
+    fields = ['rating_sum', 'rating_count'] + [f'rating_{star}' for star in STARS]
+    empty = dict.fromkeys(fields, 0)
+    aggregates = {row.pop('blog_id'): row for row in rating_aggregates()}
+
+    changed = []
+    for blog in Blog.objects.only('pk', *fields).iterator(chunk_size=batch_size):
+        values = aggregates.get(blog.pk, empty)
+        if any(getattr(blog, field) != values[field] for field in fields):
+            for field in fields:
+                setattr(blog, field, values[field])
+            changed.append(blog)
+
+    with transaction.atomic():
+        Blog.objects.bulk_update(changed, fields, batch_size=batch_size)
+    return len(changed)
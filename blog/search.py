@@ -0,0 +1,66 @@
+from django.db import connection
+
+from core.search import fts_available, fts_search, highlight, normalize_persian
+
+FTS_TABLE = 'blog_blog_fts'
+
+
+def index_blogs(blogs):
+    """افزودن وبلاگ‌های تأییدشده به نمایه FTS و حذف بقیه از آن
+
+    وبلاگ‌ها باید category را همراه داشته باشند (select_related).
+    """
+    blogs = list(blogs)
+    if not blogs or not fts_available():
+        return
+    rows = [
+        (
+            blog.pk,
+            normalize_persian(blog.title),
+            normalize_persian(blog.content),
+            normalize_persian(blog.category.name if blog.category else ''),
+        )
+        for blog in blogs if blog.is_approved
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(blog.pk,) for blog in blogs])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, content, category) VALUES (%s, %s, %s, %s)', rows
+        )
+
+
+def remove_blog(blog_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [blog_id])
+
+
+def search_blogs(blogs, query):
+    """محدود کردن queryset وبلاگ‌ها به نتایج جستجو به ترتیب امتیاز bm25"""
+    return fts_search(blogs, FTS_TABLE, query, (10.0, 1.0, 4.0))
+
+
+def add_snippets(blogs, query):
+    """افزودن search_snippet (بخش منطبق متن اصلی با <mark>) به وبلاگ‌های یک صفحه"""
+    for blog in blogs:
+        blog.search_snippet = highlight(blog.content, query)
+
+
+def rebuild_index(batch_size=500):
+    from .models import Blog
+
+    if not fts_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    total = 0
+    batch = []
+    for blog in Blog.objects.filter(is_approved=True).select_related('category').iterator(chunk_size=batch_size):
+        batch.append(blog)
+        if len(batch) >= batch_size:
+            index_blogs(batch)
+            total += len(batch)
+            batch = []
+    index_blogs(batch)
+    return total + len(batch)
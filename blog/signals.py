@@ -0,0 +1,65 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.caching import bump_version
+from core.thumbnails import schedule_variants
+from . import search
+from .models import Blog, BlogComment, BlogImage, Category
+from .ratings import apply_rating
+
+
+@receiver([post_save, post_delete], sender=Blog)
+@receiver([post_save, post_delete], sender=Category)
+def blogs_changed(sender, **kwargs):
+    """باطل کردن شمارش‌ها و شمارش فیلترهای کش‌شده فهرست وبلاگ‌ها"""
+    bump_version('blogs')
+
+
+@receiver(post_save, sender=Blog)
+def blog_saved(sender, instance, raw=False, **kwargs):
+    """به‌روزرسانی نمایه جستجو؛ وبلاگ تأییدنشده از نمایه حذف می‌شود"""
+    if not raw:
+        search.index_blogs([instance])
+
+
+@receiver(post_delete, sender=Blog)
+def blog_deleted(sender, instance, **kwargs):
+    search.remove_blog(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_blogs(instance.blogs.filter(is_approved=True).select_related('category'))
+
+
+@receiver(post_save, sender=BlogImage)
+def blog_image_saved(sender, instance, raw=False, **kwargs):
+    """ساخت نسخه‌های کوچک تصویر وبلاگ در پس‌زمینه"""
+    if not raw:
+        schedule_variants(instance.image)
+
+
+@receiver(pre_save, sender=BlogComment)
+def comment_rating_before_save(sender, instance, raw=False, **kwargs):
+    """نگه داشتن امتیاز قبلی نظر ویرایش‌شده برای کم کردن از خلاصه وبلاگ"""
+    instance._previous_rating = None
+    if not raw and not instance._state.adding:
+        instance._previous_rating = (
+            BlogComment.objects.filter(pk=instance.pk).values_list('blog_id', 'rating').first()
+        )
+
+
+@receiver(post_save, sender=BlogComment)
+def comment_rating_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_rating', None)
+    if previous is not None:
+        apply_rating(*previous, sign=-1)
+    apply_rating(instance.blog_id, instance.rating)
+
+
+@receiver(post_delete, sender=BlogComment)
+def comment_rating_deleted(sender, instance, **kwargs):
+    apply_rating(instance.blog_id, instance.rating, sign=-1)
@@ -1,3 +1,288 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Blog, BlogComment, Category
+from .search import search_blogs
+
+User = get_user_model()
+
+
+class BlogFixtureMixin:
+    """داده‌های پایه: یک نویسنده، یک دسته‌بندی و کاربرانی برای ثبت نظر"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author', password='pass')
+        cls.category = Category.objects.create(name='فنی', slug='fanni')
+        cls.users = [User.objects.create_user(username=f'user{i}', password='pass') for i in range(5)]
+
+    @classmethod
+    def make_blog(cls, **kwargs):
+        fields = {
+            'author': cls.author, 'title': 'هنرستان نمونه', 'category': cls.category,
+            'content': 'متن', 'city': 'اراک', 'is_approved': True,
+        }
+        fields.update(kwargs)
+        return Blog.objects.create(**fields)
+
+    def rate(self, blog, *ratings):
+        return [
+            BlogComment.objects.create(blog=blog, user=user, rating=rating)
+            for user, rating in zip(self.users, ratings)
+        ]
+
+
+class BlogRatingAggregateTests(BlogFixtureMixin, TestCase):
+
+    def test_comment_changes_update_aggregates(self):
+        blog = self.make_blog()
+        comments = self.rate(blog, 5, 4, 4, 1)
+        blog.refresh_from_db()
+        self.assertEqual((blog.rating_count, blog.rating_sum), (4, 14))
+        self.assertEqual(blog.avg_rating, 3.5)
+        self.assertEqual(blog.rating_percentages, {'1': 25.0, '2': 0, '3': 0.0, '4': 50.0, '5': 25.0})
+
+        comments[0].rating = 2
+        comments[0].save()
+        comments[1].delete()
+        blog.refresh_from_db()
+        self.assertEqual((blog.rating_count, blog.rating_sum), (3, 7))
+        self.assertEqual((blog.rating_2, blog.rating_4, blog.rating_5), (1, 1, 0))
+
+    def test_repair_command_recomputes_drifted_rows(self):
+        blog = self.make_blog()
+        self.rate(blog, 3, 5)
+        Blog.objects.filter(pk=blog.pk).update(rating_count=0, rating_sum=0, rating_3=9)
+        empty = self.make_blog(title='بدون نظر')
+        Blog.objects.filter(pk=empty.pk).update(rating_count=2)
+
+        call_command('repair_blog_ratings', stdout=StringIO())
+        blog.refresh_from_db()
+        empty.refresh_from_db()
+        self.assertEqual((blog.rating_count, blog.rating_sum, blog.rating_3, blog.rating_5), (2, 8, 1, 1))
+        self.assertEqual(empty.rating_count, 0)
+
+    def test_detail_reads_ratings_from_rows(self):
+        blog = self.make_blog()
+        self.rate(blog, 5, 3)
+        for i in range(3):
+            self.rate(self.make_blog(title=f'مشابه {i}'), 4, 4, 2)
+
+        # وبلاگ، نظرها، تصاویر، وبلاگ‌های مشابه و تصاویر آن‌ها؛ بدون کوئری امتیاز
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('blog:send_detail', args=[blog.slug]))
+        self.assertEqual(response.context['avg_rating'], 4.0)
+        self.assertEqual(response.context['rating_count'], 2)
+        self.assertContains(response, '3.3')
+
+
+class BlogListPaginationTests(BlogFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.blogs = [cls.make_blog(title=f'وبلاگ {i}') for i in range(15)]
+        cls.make_blog(title='تأییدنشده', is_approved=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_list(self, url=None, **params):
+        return self.client.get(url or reverse('blog:send_list'), params)
+
+    def test_pages_walk_forward_and_back(self):
+        first = self.get_list()
+        self.assertEqual(len(first.context['blogs']), 12)
+        self.assertEqual(first.context['blogs_count'], 15)
+        self.assertIsNone(first.context['previous_page_url'])
+
+        second = self.get_list(reverse('blog:send_list') + first.context['next_page_url'])
+        self.assertEqual([b.pk for b in second.context['blogs']], [b.pk for b in self.blogs[2::-1]])
+        self.assertIsNone(second.context['next_page_url'])
+
+        back = self.get_list(reverse('blog:send_list') + second.context['previous_page_url'])
+        self.assertEqual(
+            [b.pk for b in back.context['blogs']], [b.pk for b in first.context['blogs']]
+        )
+        self.assertIsNone(back.context['previous_page_url'])
+
+    def test_count_is_cached_per_filter_and_invalidated(self):
+        self.get_list(**{'city[]': ['اراک']})
+        with CaptureQueriesContext(connection) as queries:
+            self.get_list(**{'city[]': ['اراک']})
+        self.assertFalse([q for q in queries if 'COUNT(*)' in q['sql'] and 'subquery' not in q['sql']])
+
+        self.assertEqual(self.get_list(search='وبلاگ 1').context['blogs_count'], 6)
+        self.make_blog(title='وبلاگ 16')
+        self.assertEqual(self.get_list(**{'city[]': ['اراک']}).context['blogs_count'], 16)
+
+
+class BlogSearchTests(BlogFixtureMixin, TestCase):
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('FTS5 فقط روی SQLite فعال است.')
+        cache.clear()
+
+    def search(self, query):
+        return [blog.pk for blog in search_blogs(Blog.objects.all(), query)]
+
+    def test_normalized_ranked_search_with_snippets(self):
+        in_content = self.make_blog(title='معرفی', content='آموزش <b>كامپيوتر</b> در کارگاه ۱۲')
+        in_title = self.make_blog(title='کارگاه کامپیوتر', content='متن')
+        self.make_blog(title='کامپیوتر پنهان', is_approved=False)
+
+        self.assertEqual(self.search('كامپيوتر'), [in_title.pk, in_content.pk])
+        self.assertEqual(self.search('کارگاه 12'), [in_content.pk])
+
+        response = self.client.get(reverse('blog:send_list'), {'search': 'کامپیوتر'})
+        self.assertEqual([b.pk for b in response.context['blogs']], [in_title.pk, in_content.pk])
+        self.assertEqual(response.context['blogs_count'], 2)
+        # واژه با همان حروف عربی متن اصلی علامت می‌خورد
+        self.assertContains(response, '&lt;b&gt;<mark>كامپيوتر</mark>&lt;/b&gt;')
+
+    def test_snippet_keeps_original_text(self):
+        self.make_blog(title='معرفی', content='کتاب\u200cهای کارگاه ۱۲ هنرستان')
+
+        response = self.client.get(reverse('blog:send_list'), {'search': 'كارگاه 12'})
+        # نیم‌فاصله و ارقام فارسی متن اصلی در snippet می‌مانند
+        self.assertContains(response, 'کتاب\u200cهای <mark>کارگاه</mark> <mark>۱۲</mark> هنرستان')
+
+    def test_filters_apply_inside_search_and_results_are_paged(self):
+        other = Category.objects.create(name='هنر', slug='honar')
+        for number in range(13):
+            self.make_blog(title=f'کتاب {number}')
+        in_other = self.make_blog(title='کتاب هنر', category=other, city='تهران')
+        url = reverse('blog:send_list')
+
+        response = self.client.get(url, {'search': 'کتاب', 'category[]': ['honar']})
+        self.assertEqual([b.pk for b in response.context['blogs']], [in_other.pk])
+        self.assertEqual(response.context['blogs_count'], 1)
+        response = self.client.get(url, {'search': 'کتاب', 'city[]': ['تهران']})
+        self.assertEqual([b.pk for b in response.context['blogs']], [in_other.pk])
+
+        response = self.client.get(url, {'search': 'کتاب'})
+        self.assertEqual(response.context['blogs_count'], 14)
+        first_page = [b.pk for b in response.context['blogs']]
+        self.assertEqual(len(first_page), 12)
+        self.assertIsNone(response.context['previous_page_url'])
+
+        response = self.client.get(url + response.context['next_page_url'])
+        second_page = [b.pk for b in response.context['blogs']]
+        self.assertEqual(len(second_page), 2)
+        self.assertFalse(set(first_page) & set(second_page))
+        self.assertIsNone(response.context['next_page_url'])
+        response = self.client.get(url + response.context['previous_page_url'])
+        self.assertEqual([b.pk for b in response.context['blogs']], first_page)
+
+    def test_index_follows_edits_approval_and_deletes(self):
+        blog = self.make_blog(title='هنرستان فنی', is_approved=False)
+        self.assertEqual(self.search('هنرستان'), [])
+
+        admin = User.objects.create_superuser(username='admin', password='pass')
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:blog_blog_changelist'), {
+            'action': 'approve_blogs', '_selected_action': [blog.pk],
+        })
+        self.assertEqual(self.search('هنرستان'), [blog.pk])
+
+        self.category.name = 'الکترونیک'
+        self.category.save()
+        self.assertEqual(self.search('الکترونیک'), [blog.pk])
+
+        blog.delete()
+        self.assertEqual(self.search('هنرستان'), [])
+
+    def test_rebuild_command(self):
+        blog = self.make_blog(title='گرافیک')
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM blog_blog_fts')
+        call_command('rebuild_blog_search', stdout=StringIO())
+        self.assertEqual(self.search('گرافیک'), [blog.pk])
+
+
+class BlogFacetCacheTests(BlogFixtureMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.make_blog(title='الف', city='اراک')
+        cls.make_blog(title='ب', city='تهران')
+        cls.pending = cls.make_blog(title='ج', city='تهران', is_approved=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def facets(self, response):
+        categories = {c['slug']: c['count'] for c in response.context['categories']}
+        cities = {c['city']: c['count'] for c in response.context['cities']}
+        return categories, cities
+
+    def test_warm_sidebar_costs_no_queries(self):
+        url = reverse('blog:send_list')
+        self.client.get(url)
+        # فقط صفحه وبلاگ‌ها و تصاویر آن‌ها
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(self.facets(response), ({'fanni': 2}, {'اراک': 1, 'تهران': 1}))
+
+    def test_bulk_approval_invalidates_facets(self):
+        url = reverse('blog:send_list')
+        self.client.get(url)
+
+        admin = User.objects.create_superuser(username='admin', password='pass')
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:blog_blog_changelist'), {
+            'action': 'approve_blogs', '_selected_action': [self.pending.pk],
+        })
+        self.assertEqual(self.facets(self.client.get(url)), ({'fanni': 3}, {'اراک': 1, 'تهران': 2}))
+
+        Category.objects.create(name='هنر', slug='honar')
+        self.assertEqual(self.facets(self.client.get(url))[0], {'fanni': 3, 'honar': 0})
+
+
+class BlogSlugTests(BlogFixtureMixin, TestCase):
+
+    def test_same_title_gets_increasing_suffix(self):
+        slugs = [self.make_blog().slug for _ in range(12)]
+        base = slugs[0]
+        self.assertEqual(slugs, [base] + [f'{base}-{i}' for i in range(1, 12)])
+
+    def test_other_titles_with_same_prefix_are_ignored(self):
+        first = self.make_blog(title='دوره')
+        self.make_blog(title='دوره پایتون')
+        self.make_blog(title='دوره', slug=f'{first.slug}-9')
+        self.assertEqual(self.make_blog(title='دوره').slug, f'{first.slug}-10')
+
+    def test_slug_lookup_is_a_single_query(self):
+        for _ in range(20):
+            self.make_blog()
+        with CaptureQueriesContext(connection) as queries:
+            self.make_blog()
+        slug_queries = [q for q in queries.captured_queries if q['sql'].startswith('SELECT "blog_blog"."slug"')]
+        self.assertEqual(len(slug_queries), 1)
+
+    def test_empty_title_falls_back_to_blog(self):
+        self.assertEqual(self.make_blog(title='!!!').slug, 'blog')
+        self.assertEqual(self.make_blog(title='؟').slug, 'blog-1')
+
+    def test_collision_is_retried(self):
+        taken = self.make_blog()
+        # شبیه‌سازی رقابت: اسلاگ محاسبه‌شده پیش از درج گرفته شده است
+        with mock.patch.object(Blog, '_next_slug', side_effect=[taken.slug, f'{taken.slug}-1']):
+            blog = self.make_blog()
+        self.assertEqual(blog.slug, f'{taken.slug}-1')
 
-# Create your tests here.
+    def test_persistent_collision_uses_random_suffix(self):
+        taken = self.make_blog()
+        with mock.patch.object(Blog, '_next_slug', return_value=taken.slug):
+            blog = self.make_blog()
+        self.assertRegex(blog.slug, rf'^{taken.slug}-[0-9a-f]{{6}}$')
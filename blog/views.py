@@ -2,9 +2,18 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
-from django.db.models import Q, Count, Avg
+from django.core.cache import cache
+from django.db.models import Q, Count
+from core.caching import versioned_key
+from core.pagination import paginate_keyset, paginate_offset
+from core.search import fts_available
 from .forms import BlogRegisterForm, BlogImageForm, BlogCommentForm
 from .models import Blog, BlogImage, Category, BlogComment
+from .search import add_snippets, search_blogs
+
+BLOGS_PAGE_SIZE = 12
+BLOG_COUNT_TIMEOUT = 60
+BLOG_FACETS_TIMEOUT = 60 * 60
 
 @login_required
 def send_register_view(request):
@@ -43,7 +52,7 @@ def send_list_view(request):
     search = request.GET.get('search', '')
 
     # گرفتن وبلاگ‌های تأییدشده
-    blogs = Blog.objects.filter(is_approved=True).select_related('category', 'author').prefetch_related('images')
+    blogs = Blog.objects.filter(is_approved=True)
 
     # اعمال فیلترها
     if categories and 'all' not in categories:
@@ -52,23 +61,40 @@ def send_list_view(request):
     if cities and 'all' not in cities:
         blogs = blogs.filter(city__in=cities)
 
-    if search:
+    ranked = False
+    if search and fts_available():
+        # MATCH در همان کوئری فیلترشده اجرا می‌شود تا فیلترها نتایج را کوتاه نکنند
+        blogs = search_blogs(blogs, search)
+        ranked = True
+    elif search:
         blogs = blogs.filter(
             Q(title__icontains=search) |
             Q(content__icontains=search) |
             Q(category__name__icontains=search)
         )
 
+    listed = blogs.select_related('category', 'author').prefetch_related('images')
+    if ranked:
+        # نتایج جستجو به ترتیب امتیاز bm25 و با بخش منطبق متن نمایش داده می‌شوند
+        page = paginate_offset(listed, request.GET.get('cursor'), BLOGS_PAGE_SIZE)
+        add_snippets(page.object_list, search)
+        previous_param = 'cursor'
+    else:
+        page = paginate_keyset(
+            listed, request.GET.get('cursor'), BLOGS_PAGE_SIZE, before=request.GET.get('before')
+        )
+        previous_param = 'before'
+
     # گرفتن دسته‌بندی‌ها و شهرها برای فیلتر
-    all_categories = Category.objects.annotate(
-        count=Count('blogs', filter=Q(blogs__is_approved=True))
-    )
-    all_cities = Blog.objects.filter(is_approved=True).values('city').annotate(
-        count=Count('city')
-    ).order_by('city')
+    all_categories, all_cities = blog_facets()
 
     return render(request, 'send/list.html', {
-        'blogs': blogs,
+        'blogs': page,
+        'blogs_count': blog_count(blogs, sorted(categories), sorted(cities), search),
+        'next_page_url': _page_url(request, cursor=page.next_cursor) if page.has_next else None,
+        'previous_page_url': (
+            _page_url(request, **{previous_param: page.previous_cursor}) if page.has_previous else None
+        ),
         'categories': all_categories,
         'cities': all_cities,
         'current_categories': categories if categories else ['all'],
@@ -76,25 +102,57 @@ def send_list_view(request):
         'current_search': search,
     })
 
-def send_detail_view(request, slug):
-    blog = get_object_or_404(Blog, slug=slug, is_approved=True)
-    avg_rating = blog.comments.aggregate(Avg('rating'))['rating__avg'] or 0.0
-    rating_count = blog.comments.count()
 
-    rating_percentages = {}
-    for i in range(1, 6):
-        count = blog.comments.filter(rating__gte=i - 0.5, rating__lt=i + 0.5).count()
-        percentage = (count / rating_count * 100) if rating_count > 0 else 0
-        rating_percentages[str(i)] = round(percentage, 1)
+def blog_facets():
+    """شمارش وبلاگ‌های تأییدشده به تفکیک دسته‌بندی و شهر برای نوار فیلتر
+
+    نتیجه تا تغییر بعدی وبلاگ یا دسته‌بندی (سیگنال‌ها و اکشن تأیید گروهی)
+    در کش می‌ماند.
+    """
+    key = versioned_key('blogs', 'facets')
+    facets = cache.get(key)
+    if facets is None:
+        categories = list(Category.objects.annotate(
+            count=Count('blogs', filter=Q(blogs__is_approved=True))
+        ).values('name', 'slug', 'count'))
+        cities = list(Blog.objects.filter(is_approved=True).values('city').annotate(
+            count=Count('city')
+        ).order_by('city'))
+        facets = (categories, cities)
+        cache.set(key, facets, BLOG_FACETS_TIMEOUT)
+    return facets
+
+
+def blog_count(blogs, *filters):
+    """تعداد نتایج هر ترکیب فیلتر؛ یک بار محاسبه و برای مدت کوتاه کش می‌شود
+
+    نسخه کش با هر تغییر وبلاگ عوض می‌شود، پس TTL فقط سقف کهنگی است.
+    """
+    key = versioned_key('blogs', 'count', *filters)
+    count = cache.get(key)
+    if count is None:
+        count = blogs.count()
+        cache.set(key, count, BLOG_COUNT_TIMEOUT)
+    return count
+
+
+def _page_url(request, **cursor):
+    """آدرس صفحه بعد یا قبل با حفظ فیلترهای فعلی"""
+    query = request.GET.copy()
+    query.pop('cursor', None)
+    query.pop('before', None)
+    query.update(cursor)
+    return f'?{query.urlencode()}'
+
+def send_detail_view(request, slug):
+    blog = get_object_or_404(Blog.objects.select_related('category'), slug=slug, is_approved=True)
 
+    # امتیازها از ستون‌های خلاصه همان ردیف وبلاگ خوانده می‌شوند
     similar_blogs = Blog.objects.filter(
-        category=blog.category,
+        category_id=blog.category_id,
         is_approved=True
     ).exclude(slug=slug).select_related('category').prefetch_related('images')[:3]
 
-    for similar in similar_blogs:
-        similar.avg_rating = similar.comments.aggregate(avg=Avg('rating'))['avg'] or 0
-
     user_has_commented = False
     if request.user.is_authenticated:
         user_has_commented = BlogComment.objects.filter(
@@ -105,10 +163,10 @@ def send_detail_view(request, slug):
     return render(request, 'send/detail.html', {
         'blog': blog,
         'images': blog.images.all(),
-        'avg_rating': avg_rating,
-        'rating_count': rating_count,
-        'comments': blog.comments.select_related('user').order_by('-created_at')[:3],
-        'rating_percentages': rating_percentages,
+        'avg_rating': blog.avg_rating,
+        'rating_count': blog.rating_count,
+        'comments': list(blog.comments.select_related('user').order_by('-created_at')[:3]),
+        'rating_percentages': blog.rating_percentages,
         'similar_blogs': similar_blogs,
         'user_has_commented': user_has_commented,
     })
@@ -0,0 +1,83 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+
+def _version_key(namespace):
+    return f'core:version:{namespace}'
+
+
+def get_version(namespace):
+    """نسخه فعلی یک فضای نام کش
+
+    مقدار اولیه از زمان گرفته می‌شود تا اگر کلید نسخه از کش بیرون رانده شد،
+    نسخه جدید با کلیدهای قدیمی برخورد نکند.
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key, time.time_ns())
+    return version
+
+
+def bump_version(namespace):
+    """باطل کردن همه کلیدهای یک فضای نام با افزایش نسخه آن"""
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def versioned_key(namespace, *parts):
+    digest = hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+    return f'core:{namespace}:{get_version(namespace)}:{digest}'
+
+
+class CachedChoices:
+    """فهرست گزینه‌های فرم که در حافظه پروسه نگه داشته می‌شود
+
+    ``loader`` فهرست (مقدار، برچسب) را از پایگاه داده می‌سازد. فهرست تا
+    وقتی نسخه فضای نام در کش مشترک تغییر نکرده و عمر آن از ``ttl`` ثانیه
+    نگذشته دوباره ساخته نمی‌شود؛ TTL تأخیر را وقتی کش بین پروسه‌ها مشترک
+    نیست محدود می‌کند. ذخیره یا حذف هر یک از ``models`` نسخه را افزایش
+    می‌دهد؛ اگر ``fields`` داده شود، ذخیره‌هایی که با update_fields فقط
+    ستون‌های دیگر را تغییر می‌دهند (مثل last_login) نادیده گرفته می‌شوند.
+    """
+
+    ttl = 300
+
+    def __init__(self, namespace, loader, models=(), fields=None, ttl=None):
+        self.namespace = namespace
+        self.loader = loader
+        self.fields = frozenset(fields) if fields is not None else None
+        if ttl is not None:
+            self.ttl = ttl
+        self._version = None
+        self._built_at = 0.0
+        self._choices = []
+        for model in models:
+            for action, signal in (('save', post_save), ('delete', post_delete)):
+                signal.connect(
+                    self._invalidate, sender=model, weak=False,
+                    dispatch_uid=f'cached_choices:{namespace}:{action}:{model._meta.label}',
+                )
+
+    def __call__(self):
+        version = get_version(self.namespace)
+        if version != self._version or time.monotonic() - self._built_at >= self.ttl:
+            self._choices = list(self.loader())
+            self._version = version
+            self._built_at = time.monotonic()
+        return self._choices
+
+    def invalidate(self):
+        bump_version(self.namespace)
+
+    def _invalidate(self, sender, update_fields=None, **kwargs):
+        if self.fields is not None and update_fields is not None and not self.fields & set(update_fields):
+            return
+        self.invalidate()
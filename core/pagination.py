@@ -0,0 +1,103 @@
+import base64
+import binascii
+import datetime
+
+from django.db.models import Q
+
+
+class KeysetPage:
+    """یک صفحه از نتایج صفحه‌بندی‌شده (کلیدی یا رتبه‌بندی‌شده)"""
+
+    def __init__(self, object_list, next_cursor, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def encode_cursor(created_at, pk):
+    raw = f'{created_at.isoformat()}|{pk}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """بازگرداندن (created_at, id) از روی cursor؛ cursor نامعتبر یعنی صفحه اول"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def paginate_keyset(queryset, cursor=None, page_size=20, before=None):
+    """صفحه‌بندی نزولی روی (created_at, id)
+
+    برخلاف OFFSET، هزینه هر صفحه به شماره صفحه بستگی ندارد و درج ردیف
+    جدید باعث تکرار یا جا افتادن ردیف‌ها بین صفحه‌ها نمی‌شود. با before
+    صفحه قبل از یک cursor (با ترتیب صعودی و برگرداندن نتیجه) خوانده می‌شود.
+    """
+    back = decode_cursor(before)
+    if back is not None:
+        created_at, pk = back
+        queryset = queryset.order_by('created_at', 'id').filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+        )
+        items = list(queryset[:page_size + 1])
+        has_more = len(items) > page_size
+        items = items[:page_size][::-1]
+        if not items:
+            return KeysetPage(items, None)
+        previous_cursor = encode_cursor(items[0].created_at, items[0].pk) if has_more else None
+        return KeysetPage(items, encode_cursor(items[-1].created_at, items[-1].pk), previous_cursor)
+
+    queryset = queryset.order_by('-created_at', '-id')
+    position = decode_cursor(cursor)
+    if position is not None:
+        created_at, pk = position
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].pk)
+    previous_cursor = None
+    if position is not None and items:
+        previous_cursor = encode_cursor(items[0].created_at, items[0].pk)
+    return KeysetPage(items, next_cursor, previous_cursor)
+
+
+def paginate_offset(queryset, cursor=None, page_size=20):
+    """صفحه‌بندی با OFFSET برای نتایج رتبه‌بندی‌شده (مثل جستجو)
+
+    نتایج جستجو کلید مرتب یکتایی مثل (created_at, id) ندارند؛ cursor اینجا
+    شماره صفحه است و مقدار نامعتبر یعنی صفحه اول.
+    """
+    try:
+        page = max(int(cursor), 1)
+    except (TypeError, ValueError):
+        page = 1
+    offset = (page - 1) * page_size
+    items = list(queryset[offset:offset + page_size + 1])
+    next_cursor = str(page + 1) if len(items) > page_size else None
+    previous_cursor = str(page - 1) if page > 1 else None
+    return KeysetPage(items[:page_size], next_cursor, previous_cursor)
@@ -0,0 +1,95 @@
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+# یکسان‌سازی حروف عربی و فارسی، ارقام و حذف اعراب و کشیده
+PERSIAN_TRANSLATION = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'ٱ': 'ا',
+    'ؤ': 'و',
+    '\u200c': ' ', '\u200d': '', '\u0640': '',
+    **{chr(0x06F0 + i): str(i) for i in range(10)},
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+})
+DIACRITICS_RE = re.compile('[\u064b-\u065f\u0670]')
+TOKEN_RE = re.compile(r'\w+')
+# واژه در متن اصلی؛ اعراب، کشیده و ZWJ جزو واژه‌اند و نیم‌فاصله واژه را جدا می‌کند
+WORD_RE = re.compile('[\\w\u064b-\u065f\u0670\u0640\u200d]+')
+
+
+def normalize_persian(text):
+    """نرمال‌سازی متن فارسی برای نمایه و جستجو
+
+    ی و ک عربی به فارسی، ارقام فارسی و عربی به لاتین، نیم‌فاصله به فاصله
+    تبدیل و اعراب و کشیده حذف می‌شوند.
+    """
+    if not text:
+        return ''
+    return DIACRITICS_RE.sub('', text.translate(PERSIAN_TRANSLATION)).lower()
+
+
+def build_match_query(query):
+    """ساخت عبارت MATCH امن برای FTS5: هر واژه به صورت پیشوندی و با AND"""
+    tokens = TOKEN_RE.findall(normalize_persian(query))
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def fts_search(queryset, table, query, weights=()):
+    """محدود کردن و مرتب‌سازی queryset با نمایه FTS5 در همان کوئری
+
+    جدول FTS با rowid برابر کلید اصلی به جدول مدل join می‌شود، پس فیلترهای
+    queryset پیش از صفحه‌بندی اعمال می‌شوند و نتیجه‌ای جا نمی‌افتد. امتیاز
+    bm25 در search_rank قرار می‌گیرد (کمتر یعنی مرتبط‌تر).
+    """
+    match = build_match_query(query)
+    if not match:
+        return queryset.none()
+    opts = queryset.model._meta
+    quote = connection.ops.quote_name
+    rank = f"bm25({', '.join([table, *map(str, weights)])})"
+    return queryset.extra(
+        select={'search_rank': rank},
+        tables=[table],
+        where=[f'{table}.rowid = {quote(opts.db_table)}.{quote(opts.pk.column)}', f'{table} MATCH %s'],
+        params=[match],
+    ).order_by('search_rank', '-pk')
+
+
+def highlight(text, query, words=24):
+    """بخشی از متن اصلی حول اولین واژه منطبق با واژه‌های منطبق در <mark>
+
+    تطبیق مثل نمایه روی شکل نرمال‌شده و پیشوندی است، اما خروجی از خود متن
+    ساخته می‌شود تا نیم‌فاصله و ارقام فارسی حفظ شوند. بقیه متن escape می‌شود و
+    اگر واژه‌ای در متن منطبق نباشد رشته خالی برمی‌گردد.
+    """
+    terms = TOKEN_RE.findall(normalize_persian(query))
+    tokens = list(WORD_RE.finditer(text or ''))
+    hits = [
+        any(normalize_persian(token.group()).startswith(term) for term in terms)
+        for token in tokens
+    ]
+    if not any(hits):
+        return ''
+    start = max(hits.index(True) - words // 2, 0)
+    end = min(start + words, len(tokens))
+    start = max(end - words, 0)
+
+    parts = ['…'] if start > 0 else []
+    position = tokens[start].start()
+    for token, hit in zip(tokens[start:end], hits[start:end]):
+        if hit:
+            parts.append(escape(text[position:token.start()]))
+            parts.append(f'<mark>{escape(token.group())}</mark>')
+            position = token.end()
+    parts.append(escape(text[position:tokens[end - 1].end()]))
+    if end < len(tokens):
+        parts.append('…')
+    return mark_safe(''.join(parts))
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import sys
 
 # مسیر اصلی پروژه
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -19,6 +20,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     # اپلیکیشن‌های سفارشی
+    'core',
     'accounts',
     'blog',
     'index',
@@ -99,3 +101,45 @@ AUTH_USER_MODEL = 'accounts.CustomUser'
 
 # تنظیم خودکار ID‌ها
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# فاصله (ثانیه) نوشتن دسته‌ای لاگ‌های دانلود و مشاهده منابع؛ صفر یعنی نوشتن فوری
+RESOURCE_LOG_FLUSH_INTERVAL = 2.0
+
+# روش ارسال فایل منابع: 'django' (FileResponse)، 'x-accel' (nginx) یا 'x-sendfile' (Apache)
+RESOURCE_DELIVERY_MODE = 'django'
+RESOURCE_ACCEL_PREFIX = '/protected-media/'
+RESOURCE_CACHE_MAX_AGE = 3600
+
+# کش مشترک بین پروسه‌های وب‌سرور؛ نسخه‌های کش (core.caching.bump_version)، محتوای سراسری
+# و قطعه‌های کش‌شده قالب‌ها باید در همه پروسه‌ها یکسان باشند. LocMemCache پیش‌فرض
+# جنگو برای هر پروسه جداست و تغییرات را به پروسه‌های دیگر نمی‌رساند.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'var' / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# تست‌ها کش جداگانه در حافظه دارند تا cache.clear() کش سرور همین پوشه را پاک نکند
+if sys.argv[1:2] == ['test']:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# عمر (ثانیه) لایه کش درون پروسه برای محتوای سراسری مثل درباره ما و اطلاعات تماس
+SITE_CONTENT_LOCAL_TTL = 5.0
+
+# صف محلی پیام‌های تماس (با دستور drain_contact_spool تخلیه می‌شود) و محدودیت نرخ ارسال برای هر IP
+CONTACT_SPOOL_PATH = BASE_DIR / 'var' / 'contact_spool.sqlite3'
+CONTACT_RATE_LIMIT_BURST = 5
+CONTACT_RATE_LIMIT_PER_MINUTE = 5
+
+# تعداد پراکسی‌های معکوس جلوی سایت؛ محدودیت نرخ آدرسی را که آخرین پراکسی در
+# X-Forwarded-For ثبت کرده استفاده می‌کند (صفر یعنی REMOTE_ADDR)
+TRUSTED_PROXY_COUNT = 0
+
+# عرض‌های نسخه‌های WebP تصاویر آپلودشده (در media/thumbs) و کیفیت فشرده‌سازی
+THUMBNAIL_WIDTHS = (320, 640, 1024)
+THUMBNAIL_QUALITY = 80
+
+# اجرای کارهای پس‌زمینه (ساخت تصاویر کوچک و ...) در همان نخ درخواست
+BACKGROUND_TASKS_EAGER = False
@@ -0,0 +1,65 @@
+import atexit
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWorker:
+    """صف کار پس‌زمینه درون پروسه با یک نخ مصرف‌کننده
+
+    کارها پس از commit تراکنش جاری در صف قرار می‌گیرند تا نخ پس‌زمینه
+    ردیف ذخیره‌نشده را نخواند. اگر BACKGROUND_TASKS_EAGER فعال باشد
+    (مثلاً در تست‌ها) کار بلافاصله در همان نخ اجرا می‌شود.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args):
+        if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+            self._run(func, args)
+            return
+        transaction.on_commit(lambda: self._enqueue(func, args))
+
+    def _enqueue(self, func, args):
+        self._ensure_thread()
+        self._queue.put((func, args))
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            func, args = self._queue.get()
+            close_old_connections()
+            try:
+                self._run(func, args)
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+    def _run(self, func, args):
+        try:
+            func(*args)
+        except Exception:
+            logger.exception('خطا در اجرای کار پس‌زمینه %s', getattr(func, '__name__', func))
+
+    def join(self):
+        """انتظار تا خالی شدن صف"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+
+media_worker = BackgroundWorker('media-worker')
+atexit.register(media_worker.join)
@@ -0,0 +1,39 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+from ..thumbnails import is_thumbnail_source, pick_width, thumbnail_widths, variant_info, variant_name
+
+register = template.Library()
+
+
+def _variants(image):
+    """فهرست (عرض، آدرس) نسخه‌های تصویر
+
+    اگر نسخه‌ها هنوز ساخته نشده باشند آدرس نمای ساخت تنبل برگردانده می‌شود
+    که در اولین درخواست نسخه را می‌سازد و به آن هدایت می‌کند.
+    """
+    name = getattr(image, 'name', None)
+    if not is_thumbnail_source(name):
+        return []
+    info = variant_info(name)
+    if info is None:
+        return [(width, reverse('thumbnail', args=[width, name])) for width in thumbnail_widths()]
+    digest, widths = info
+    return [(width, default_storage.url(variant_name(digest, width))) for width in widths]
+
+
+@register.simple_tag
+def srcset(image):
+    """مقدار ویژگی srcset برای یک ImageField؛ {% srcset major.image %}"""
+    return ', '.join(f'{url} {width}w' for width, url in _variants(image))
+
+
+@register.simple_tag
+def thumbnail_url(image, width):
+    """آدرس کوچک‌ترین نسخه‌ای که دست‌کم width پیکسل عرض دارد"""
+    variants = _variants(image)
+    if not variants:
+        return image.url if image else ''
+    urls = dict(variants)
+    return urls[pick_width(sorted(urls), int(width))]
@@ -0,0 +1,134 @@
+import hashlib
+import io
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+from .tasks import media_worker
+
+THUMBNAIL_DIR = 'thumbs'
+
+# فقط تصاویر آپلودشده در این پوشه‌ها نسخه کوچک‌شده دارند
+SOURCE_PREFIXES = ('majors/', 'works/', 'teachers/', 'thumbnails/', 'blog_images/')
+
+# پس از ساخت نسخه‌های یک تصویر با آرگومان name فرستاده می‌شود تا اپ‌ها
+# قطعه‌های کش‌شده‌ای را که آدرس موقت نمای ساخت تنبل دارند باطل کنند
+variants_generated = Signal()
+
+
+def thumbnail_widths():
+    return tuple(getattr(settings, 'THUMBNAIL_WIDTHS', (320, 640, 1024)))
+
+
+def _name_digest(name):
+    return hashlib.md5(name.encode('utf-8')).hexdigest()
+
+
+def _info_key(name):
+    return 'core:thumbs:' + _name_digest(name)
+
+
+def manifest_name(name):
+    """مسیر فایل JSON که نام تصویر اصلی را به هش محتوا و عرض نسخه‌ها نگاشت می‌کند"""
+    digest = _name_digest(name)
+    return f'{THUMBNAIL_DIR}/manifest/{digest[:2]}/{digest}.json'
+
+
+def variant_name(digest, width):
+    """مسیر نسخه WebP بر اساس هش محتوای فایل اصلی
+
+    فایل‌های با محتوای یکسان یک مجموعه نسخه مشترک دارند.
+    """
+    return f'{THUMBNAIL_DIR}/{digest[:2]}/{digest}/{width}.webp'
+
+
+def is_thumbnail_source(name):
+    return bool(name) and name.startswith(SOURCE_PREFIXES) and '..' not in name
+
+
+def variant_info(name):
+    """(هش، عرض‌های ساخته‌شده) یا None اگر نسخه‌ها هنوز ساخته نشده‌اند
+
+    کش فقط لایه سریع است؛ در نبود کلید (راه‌اندازی دوباره یا بیرون رانده
+    شدن) فایل manifest کنار نسخه‌ها خوانده می‌شود و فایل اصلی دوباره هش
+    نمی‌شود.
+    """
+    info = cache.get(_info_key(name))
+    if info is not None:
+        return info
+    try:
+        with default_storage.open(manifest_name(name), 'rb') as manifest:
+            data = json.loads(manifest.read())
+    except (FileNotFoundError, ValueError):
+        return None
+    info = (data['digest'], data['widths'])
+    cache.set(_info_key(name), info, None)
+    return info
+
+
+def _digest(name):
+    sha = hashlib.sha256()
+    with default_storage.open(name, 'rb') as source:
+        for chunk in source.chunks():
+            sha.update(chunk)
+    return sha.hexdigest()[:32]
+
+
+def generate_variants(name):
+    """ساخت نسخه‌های WebP تصویر در عرض‌های THUMBNAIL_WIDTHS
+
+    تصویر بزرگ‌نمایی نمی‌شود؛ عرض‌های بزرگ‌تر از تصویر اصلی به عرض خود
+    تصویر محدود می‌شوند. نسخه‌های موجود دوباره ساخته نمی‌شوند و نتیجه در
+    فایل manifest ثبت می‌شود.
+    """
+    digest = _digest(name)
+    with default_storage.open(name, 'rb') as source, Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        widths = sorted({min(width, image.width) for width in thumbnail_widths()})
+        for width in widths:
+            target = variant_name(digest, width)
+            if default_storage.exists(target):
+                continue
+            height = max(1, round(image.height * width / image.width))
+            buffer = io.BytesIO()
+            image.resize((width, height), Image.LANCZOS).save(
+                buffer, 'WEBP', quality=getattr(settings, 'THUMBNAIL_QUALITY', 80), method=4
+            )
+            default_storage.save(target, ContentFile(buffer.getvalue()))
+
+    manifest = manifest_name(name)
+    if default_storage.exists(manifest):
+        default_storage.delete(manifest)
+    default_storage.save(manifest, ContentFile(json.dumps({'digest': digest, 'widths': widths})))
+
+    info = (digest, widths)
+    cache.set(_info_key(name), info, None)
+    variants_generated.send(sender=None, name=name)
+    return info
+
+
+def ensure_variants(name):
+    if is_thumbnail_source(name) and variant_info(name) is None:
+        generate_variants(name)
+
+
+def schedule_variants(field_file):
+    """ساخت نسخه‌ها در نخ پس‌زمینه پس از ذخیره فایل"""
+    if field_file and is_thumbnail_source(field_file.name):
+        media_worker.submit(ensure_variants, field_file.name)
+
+
+def pick_width(widths, requested):
+    """کوچک‌ترین نسخه‌ای که از عرض خواسته‌شده کمتر نیست"""
+    for width in widths:
+        if width >= requested:
+            return width
+    return widths[-1]
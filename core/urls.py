@@ -20,8 +20,12 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from . import views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # ساخت تنبل نسخه‌های کوچک تصاویر (core.thumbnails)
+    path('thumbs/<int:width>/<path:name>', views.thumbnail, name='thumbnail'),
     path('', include('accounts.urls')),
     path('', include('blog.urls')),
     path('', include('index.urls')),
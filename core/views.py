@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import Http404
+from django.shortcuts import redirect
+from django.utils.cache import patch_cache_control
+from PIL import Image
+
+from .thumbnails import generate_variants, is_thumbnail_source, pick_width, thumbnail_widths, variant_info, variant_name
+
+
+def thumbnail(request, width, name):
+    """ساخت تنبل نسخه WebP در اولین درخواست و هدایت به فایل آن
+
+    حالت معمول ساخت نسخه‌ها هنگام آپلود در نخ پس‌زمینه است؛ این نما فقط
+    برای تصاویری است که هنوز نسخه ندارند.
+    """
+    if width not in thumbnail_widths() or not is_thumbnail_source(name) or not default_storage.exists(name):
+        raise Http404('تصویر یافت نشد.')
+    info = variant_info(name)
+    if info is None:
+        try:
+            info = generate_variants(name)
+        except (OSError, Image.DecompressionBombError):
+            # فایل تصویر معتبر نیست یا بیش از حد بزرگ است
+            raise Http404('تصویر یافت نشد.')
+    digest, widths = info
+    response = redirect(default_storage.url(variant_name(digest, pick_width(widths, width))))
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'RESOURCE_CACHE_MAX_AGE', 3600))
+    return response
@@ -2,10 +2,14 @@ from django.contrib import admin
 from django.utils import timezone
 from django.urls import path
 from django.http import HttpResponseRedirect
-from django.db.models import Count
+from django.db.models import Sum
 from django.shortcuts import render, get_object_or_404
 from django.contrib import messages
-from .models import Schedule, Class, Student, ClassSchedule, Attendance
+from .models import Schedule, Class, Student, ClassSchedule, Attendance, AttendanceDailyStat
+from .forms import RosterUploadForm
+from .roster import import_roster, read_roster
+from .exports import attendance_export_response
+from .timetable import DAYS, build_timetable, get_zengs
 
 
 @admin.register(Schedule)
@@ -26,6 +30,47 @@ class StudentAdmin(admin.ModelAdmin):
     list_display = ('row_number', 'first_name', 'last_name', 'father_name', 'class_obj')
     list_filter = ('class_obj',)
     search_fields = ('first_name', 'last_name', 'father_name')
+    change_list_template = 'admin/form/student/change_list.html'
+
+    def get_urls(self):
+        """اضافه کردن URL برای ورود گروهی دانش‌آموزان"""
+        urls = super().get_urls()
+        custom_urls = [
+            path('import/', self.admin_site.admin_view(self.import_roster_view), name='form_student_import'),
+        ]
+        return custom_urls + urls
+
+    def import_roster_view(self, request):
+        """آپلود فایل CSV/XLSX و ثبت گروهی دانش‌آموزان"""
+        if request.method == 'POST':
+            form = RosterUploadForm(request.POST, request.FILES)
+            if form.is_valid():
+                upload = form.cleaned_data['file']
+                try:
+                    result = import_roster(
+                        read_roster(upload, upload.name),
+                        create_classes=form.cleaned_data['create_classes'],
+                    )
+                except ImportError:
+                    messages.error(request, 'برای خواندن XLSX کتابخانه openpyxl باید نصب باشد.')
+                else:
+                    for line, error in result.errors[:20]:
+                        messages.warning(request, f'خط {line}: {error}')
+                    if result.read_error:
+                        messages.error(request, str(result))
+                    else:
+                        messages.success(request, str(result))
+                    return HttpResponseRedirect('../')
+        else:
+            form = RosterUploadForm()
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'ورود گروهی دانش‌آموزان',
+            'form': form,
+        }
+        return render(request, 'admin/form/student/import_roster.html', context)
 
 
 @admin.register(ClassSchedule)
@@ -47,48 +92,13 @@ class ClassScheduleAdmin(admin.ModelAdmin):
         classes = Class.objects.all()
         selected_class = None
         schedules = []
-        days = [
-            ('Sat', 'شنبه'),
-            ('Sun', 'یک‌شنبه'),
-            ('Mon', 'دوشنبه'),
-            ('Tue', 'سه‌شنبه'),
-            ('Wed', 'چهارشنبه'),
-        ]
-        zengs = Schedule.objects.exclude(zeng=5).order_by('zeng')
+        days = DAYS
+        zengs = get_zengs()
 
         try:
             if request.GET.get('class_id'):
                 selected_class = get_object_or_404(Class, id=request.GET.get('class_id'))
-                for day, day_name in days:
-                    day_schedules = []
-                    for zeng in zengs:
-                        split_schedules = ClassSchedule.objects.filter(
-                            class_obj=selected_class,
-                            schedule=zeng,
-                            day=day,
-                            is_split=True
-                        ).order_by('split_part')
-
-                        if split_schedules.exists():
-                            day_schedules.append({
-                                'zeng': zeng,
-                                'is_split': True,
-                                'first_half': split_schedules.filter(split_part=1).first(),
-                                'second_half': split_schedules.filter(split_part=2).first()
-                            })
-                        else:
-                            schedule = ClassSchedule.objects.filter(
-                                class_obj=selected_class,
-                                schedule=zeng,
-                                day=day,
-                                is_split=False
-                            ).first()
-                            day_schedules.append({
-                                'zeng': zeng,
-                                'is_split': False,
-                                'schedule': schedule
-                            })
-                    schedules.append({'day': day, 'day_name': day_name, 'periods': day_schedules})
+                schedules = build_timetable(selected_class, zengs)
             else:
                 messages.info(request, 'لطفاً یک کلاس انتخاب کنید.')
         except Exception as e:
@@ -109,12 +119,26 @@ class AttendanceAdmin(admin.ModelAdmin):
     list_display = ('student', 'class_schedule', 'get_status_display', 'date', 'zeng')
     list_filter = ('status', 'date', 'class_schedule__schedule')
     search_fields = ('student__first_name', 'student__last_name')
+    actions = ['export_csv', 'export_xlsx']
 
     def zeng(self, obj):
         """نمایش نام زنگ به جای شماره"""
         return obj.class_schedule.schedule.get_zeng_display()
     zeng.short_description = 'زنگ'
 
+    def export_csv(self, request, queryset):
+        """خروجی CSV رکوردهای انتخاب‌شده"""
+        return attendance_export_response(queryset, 'attendance', 'csv')
+    export_csv.short_description = 'خروجی CSV'
+
+    def export_xlsx(self, request, queryset):
+        """خروجی XLSX رکوردهای انتخاب‌شده"""
+        try:
+            return attendance_export_response(queryset, 'attendance', 'xlsx')
+        except ImportError:
+            messages.error(request, 'برای خروجی XLSX کتابخانه openpyxl باید نصب باشد.')
+    export_xlsx.short_description = 'خروجی XLSX'
+
     def get_queryset(self, request):
         """فیلتر کردن غیبت‌ها برای مسیر خاص"""
         qs = super().get_queryset(request)
@@ -129,11 +153,11 @@ class AttendanceAdmin(admin.ModelAdmin):
             self.list_display = ('student', 'class_schedule', 'date', 'zeng')
             self.list_filter = ('date', 'class_schedule__schedule')
             try:
-                current_month = timezone.now().month
-                absent_counts = Attendance.objects.filter(
-                    status='A',
-                    date__month=current_month
-                ).values('student__first_name', 'student__last_name').annotate(count=Count('id'))
+                month_start = timezone.localdate().replace(day=1)
+                absent_counts = AttendanceDailyStat.objects.filter(
+                    date__gte=month_start,
+                    absent__gt=0
+                ).values('student__first_name', 'student__last_name').annotate(count=Sum('absent'))
                 extra_context['absent_counts'] = absent_counts
             except Exception as e:
                 messages.error(request, f'خطا در بارگذاری آمار غیبت‌ها: {str(e)}')
@@ -0,0 +1,73 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.utils import timezone
+
+from .models import Schedule
+
+# هر پروسه جدول زنگ‌ها را در حافظه نگه می‌دارد؛ سیگنال‌ها در همان پروسه آن را
+# باطل می‌کنند و TTL تأخیر دیدن تغییرات در پروسه‌های دیگر را محدود می‌کند.
+BELL_TABLE_TTL = 300
+
+_lock = threading.Lock()
+_table = None
+_built_at = 0.0
+
+
+class BellTable:
+    """جدول از پیش محاسبه‌شده زنگ‌های فعال برای هر لحظه از روز
+
+    مرزهای شروع و پایان همه زنگ‌ها مرتب می‌شوند و برای هر مرز و هر بازه
+    بین دو مرز، مجموعه زنگ‌های فعال ذخیره می‌شود؛ پس جستجو با bisect
+    در O(log n) انجام می‌شود.
+    """
+
+    def __init__(self, schedules):
+        self.always = frozenset(s.id for s in schedules if s.zeng == 5)
+        timed = [
+            s for s in schedules
+            if s.zeng != 5 and s.start_time is not None and s.end_time is not None
+        ]
+        self.points = sorted({s.start_time for s in timed} | {s.end_time for s in timed})
+        self.at_point = [
+            frozenset(s.id for s in timed if s.start_time <= p <= s.end_time)
+            for p in self.points
+        ]
+        self.between = [
+            frozenset(s.id for s in timed if s.start_time <= low and s.end_time >= high)
+            for low, high in zip(self.points, self.points[1:])
+        ]
+
+    def active_ids(self, at):
+        i = bisect_left(self.points, at)
+        if i < len(self.points) and self.points[i] == at:
+            return self.always | self.at_point[i]
+        if 0 < i < len(self.points):
+            return self.always | self.between[i - 1]
+        return self.always
+
+
+def get_bell_table():
+    global _table, _built_at
+    table = _table
+    if table is not None and time.monotonic() - _built_at < BELL_TABLE_TTL:
+        return table
+    with _lock:
+        if _table is None or time.monotonic() - _built_at >= BELL_TABLE_TTL:
+            _table = BellTable(list(Schedule.objects.only('id', 'zeng', 'start_time', 'end_time')))
+            _built_at = time.monotonic()
+        return _table
+
+
+def invalidate_bell_table():
+    global _table
+    with _lock:
+        _table = None
+
+
+def active_schedule_ids(at=None):
+    """شناسه زنگ‌های فعال در زمان داده‌شده (پیش‌فرض: اکنون به وقت محلی)"""
+    if at is None:
+        at = timezone.localtime(timezone.now()).time()
+    return get_bell_table().active_ids(at)
@@ -0,0 +1,34 @@
+from django import forms
+from django.contrib.auth import get_user_model
+
+from core.caching import CachedChoices
+
+
+def _teacher_choices():
+    users = get_user_model().objects.order_by('pk').values_list('pk', 'first_name', 'last_name', 'username')
+    return [(pk, f'{first} {last}'.strip() or username) for pk, first, last, username in users]
+
+
+# گزینه‌های انتخاب معلم در برنامه هفتگی
+teacher_choices = CachedChoices(
+    'teacher_choices', _teacher_choices,
+    models=[get_user_model()], fields=['first_name', 'last_name', 'username'],
+)
+
+
+# ---------- فرم آپلود فهرست دانش‌آموزان ----------
+class RosterUploadForm(forms.Form):
+    file = forms.FileField(
+        label='فایل CSV یا XLSX',
+        help_text='ستون‌ها: class, row_number, first_name, last_name, father_name',
+    )
+    create_classes = forms.BooleanField(
+        required=False,
+        label='ساخت کلاس‌هایی که وجود ندارند',
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data['file']
+        if not file.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('فقط فایل‌های CSV و XLSX پذیرفته می‌شوند.')
+        return file
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from form.roster import import_roster, read_roster
+
+
+class Command(BaseCommand):
+    help = "ورود گروهی دانش‌آموزان از فایل CSV یا XLSX (ستون‌ها: class, row_number, first_name, last_name, father_name)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--create-classes', action='store_true', help="ساخت کلاس‌هایی که وجود ندارند")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            file = open(path, 'rb')
+        except OSError as e:
+            raise CommandError(f"خطا در باز کردن فایل: {e}")
+
+        with file:
+            try:
+                result = import_roster(
+                    read_roster(file, path),
+                    batch_size=options['batch_size'],
+                    create_classes=options['create_classes'],
+                )
+            except ImportError:
+                raise CommandError("برای خواندن XLSX کتابخانه openpyxl باید نصب باشد.")
+
+        for line, error in result.errors:
+            self.stderr.write(f"خط {line}: {error}")
+        if result.read_error:
+            raise CommandError(str(result))
+        self.stdout.write(self.style.SUCCESS(str(result)))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from form.services import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "ساخت دوباره جدول خلاصه روزانه حضور و غیاب از روی رکوردهای Attendance"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total = rebuild_daily_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{total} ردیف خلاصه روزانه ساخته شد."))
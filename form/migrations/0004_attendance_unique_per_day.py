@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:54
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def remove_duplicate_attendances(apps, schema_editor):
+    """نگه داشتن آخرین رکورد هر دانش‌آموز در هر زنگ و روز پیش از افزودن قید یکتا"""
+    Attendance = apps.get_model("form", "Attendance")
+    duplicates = (
+        Attendance.objects.values("student", "class_schedule", "date")
+        .annotate(last_id=Max("id"), total=models.Count("id"))
+        .filter(total__gt=1)
+    )
+    for row in duplicates:
+        Attendance.objects.filter(
+            student=row["student"],
+            class_schedule=row["class_schedule"],
+            date=row["date"],
+        ).exclude(id=row["last_id"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("form", "0003_attendance_form_attend_student_6d0a4d_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_attendances, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="attendance",
+            constraint=models.UniqueConstraint(
+                fields=("student", "class_schedule", "date"),
+                name="form_attendance_unique_per_day",
+            ),
+        ),
+    ]
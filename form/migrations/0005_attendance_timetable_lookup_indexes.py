@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("form", "0004_attendance_unique_per_day"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="attendance",
+            name="form_attendance_unique_per_day",
+        ),
+        migrations.AddIndex(
+            model_name="classschedule",
+            index=models.Index(
+                fields=["teacher", "day", "schedule"],
+                name="form_classs_teacher_06e2db_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="attendance",
+            constraint=models.UniqueConstraint(
+                fields=("class_schedule", "date", "student"),
+                name="form_attendance_unique_per_day",
+            ),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("form", "0005_attendance_timetable_lookup_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttendanceDailyStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Date")),
+                (
+                    "present",
+                    models.PositiveIntegerField(default=0, verbose_name="Present"),
+                ),
+                (
+                    "absent",
+                    models.PositiveIntegerField(default=0, verbose_name="Absent"),
+                ),
+                ("late", models.PositiveIntegerField(default=0, verbose_name="Late")),
+                (
+                    "class_obj",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="form.class",
+                        verbose_name="Class",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="form.student",
+                        verbose_name="Student",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Attendance Daily Stat",
+                "verbose_name_plural": "Attendance Daily Stats",
+                "indexes": [
+                    models.Index(
+                        fields=["date", "student"], name="form_attend_date_1a694f_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("student", "class_obj", "date"),
+                        name="form_attendancedailystat_unique_per_day",
+                    )
+                ],
+            },
+        ),
+    ]
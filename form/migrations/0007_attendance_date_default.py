@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("form", "0006_attendancedailystat"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="attendance",
+            name="date",
+            field=models.DateField(
+                default=django.utils.timezone.localdate, verbose_name="Date"
+            ),
+        ),
+    ]
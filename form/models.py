@@ -94,6 +94,7 @@ class ClassSchedule(models.Model):
         verbose_name_plural = "Class Schedules"
         indexes = [
             models.Index(fields=['class_obj', 'schedule', 'day']),
+            models.Index(fields=['teacher', 'day', 'schedule']),
         ]
 
     def clean(self):
@@ -110,8 +111,10 @@ class ClassSchedule(models.Model):
 
     def is_active(self):
         """بررسی فعال بودن برنامه کلاسی"""
+        from .bells import active_schedule_ids
+
         today = timezone.now().strftime('%a')[:3]
-        return self.day == today and (self.schedule.zeng == 5 or self.schedule.is_active())
+        return self.day == today and self.schedule_id in active_schedule_ids()
 
 
 class Attendance(models.Model):
@@ -124,7 +127,7 @@ class Attendance(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendances', verbose_name="Student")
     class_schedule = models.ForeignKey(ClassSchedule, on_delete=models.CASCADE, related_name='attendances', verbose_name="Class Schedule")
     status = models.CharField(max_length=1, choices=STATUS_CHOICES, default='P', verbose_name="Status")
-    date = models.DateField(auto_now_add=True, verbose_name="Date")
+    date = models.DateField(default=timezone.localdate, verbose_name="Date")
 
     class Meta:
         verbose_name = "Attendance"
@@ -132,6 +135,38 @@ class Attendance(models.Model):
         indexes = [
             models.Index(fields=['student', 'date']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['class_schedule', 'date', 'student'],
+                name='form_attendance_unique_per_day',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.get_status_display()} ({self.date})"
+
+
+class AttendanceDailyStat(models.Model):
+    """خلاصه روزانه حضور و غیاب هر دانش‌آموز در هر کلاس"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='daily_stats', verbose_name="Student")
+    class_obj = models.ForeignKey(Class, on_delete=models.CASCADE, related_name='daily_stats', verbose_name="Class")
+    date = models.DateField(verbose_name="Date")
+    present = models.PositiveIntegerField(default=0, verbose_name="Present")
+    absent = models.PositiveIntegerField(default=0, verbose_name="Absent")
+    late = models.PositiveIntegerField(default=0, verbose_name="Late")
+
+    class Meta:
+        verbose_name = "Attendance Daily Stat"
+        verbose_name_plural = "Attendance Daily Stats"
+        indexes = [
+            models.Index(fields=['date', 'student']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'class_obj', 'date'],
+                name='form_attendancedailystat_unique_per_day',
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.student} - {self.get_status_display()} ({self.date})"
\ No newline at end of file
+        return f"{self.student} - {self.date} (P:{self.present} A:{self.absent} L:{self.late})"
@@ -0,0 +1,146 @@
+import csv
+import io
+import time
+import zipfile
+
+from django.db import transaction
+
+from .models import Class, Student
+
+ROSTER_COLUMNS = ('class', 'row_number', 'first_name', 'last_name', 'father_name')
+NAME_MAX_LENGTH = Student._meta.get_field('first_name').max_length
+
+
+class RosterImportResult:
+    """نتیجه ورود گروهی دانش‌آموزان"""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+        self.elapsed = 0.0
+        # خطای خواندن فایل (مثلاً کدگذاری غیر UTF-8) که ورود را متوقف کرده است
+        self.read_error = None
+
+    @property
+    def rows_per_second(self):
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        summary = (
+            f"{self.created} دانش‌آموز در {self.elapsed:.2f} ثانیه ثبت شد "
+            f"({self.rows_per_second:.0f} ردیف در ثانیه، {len(self.errors)} خطا)."
+        )
+        if self.read_error:
+            summary += f" خواندن فایل متوقف شد: {self.read_error}"
+        return summary
+
+
+def read_csv(file):
+    """خواندن ردیف‌های CSV به صورت جریانی (فایل باینری یا متنی)"""
+    if isinstance(file, io.TextIOBase):
+        text = file
+    else:
+        text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    yield from csv.DictReader(text)
+
+
+class RosterReadError(Exception):
+    """فایل فهرست قابل خواندن نیست (مثلاً XLSX خراب یا تغییرنام‌یافته)"""
+
+
+def read_xlsx(file):
+    """خواندن ردیف‌های XLSX در حالت read_only بدون بارگذاری کل فایل"""
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError, OSError):
+        raise RosterReadError('فایل XLSX معتبر نیست.')
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+        for values in rows:
+            yield dict(zip(header, values))
+    except (zipfile.BadZipFile, KeyError, OSError):
+        raise RosterReadError('فایل XLSX ناقص یا خراب است.')
+    finally:
+        workbook.close()
+
+
+def read_roster(file, name):
+    if name.lower().endswith('.xlsx'):
+        return read_xlsx(file)
+    return read_csv(file)
+
+
+def _clean_row(row, class_ids, create_classes):
+    class_name = str(row.get('class') or '').strip()
+    if not class_name:
+        raise ValueError('نام کلاس خالی است.')
+    if class_name not in class_ids:
+        if not create_classes:
+            raise ValueError(f'کلاس «{class_name}» وجود ندارد.')
+        class_ids[class_name] = Class.objects.create(name=class_name).id
+
+    try:
+        row_number = int(str(row.get('row_number') or '').strip())
+    except ValueError:
+        raise ValueError('شماره ردیف باید عدد باشد.')
+    if row_number < 0:
+        raise ValueError('شماره ردیف نمی‌تواند منفی باشد.')
+
+    names = {}
+    for field in ('first_name', 'last_name', 'father_name'):
+        value = str(row.get(field) or '').strip()
+        if not value:
+            raise ValueError(f'ستون {field} خالی است.')
+        if len(value) > NAME_MAX_LENGTH:
+            raise ValueError(f'ستون {field} بیش از {NAME_MAX_LENGTH} کاراکتر است.')
+        names[field] = value
+
+    return Student(class_obj_id=class_ids[class_name], row_number=row_number, **names)
+
+
+def import_roster(rows, batch_size=500, create_classes=False):
+    """ورود گروهی دانش‌آموزان
+
+    نام کلاس‌ها با یک کوئری به شناسه تبدیل می‌شوند، ردیف‌ها در دسته‌های
+    batch_size اعتبارسنجی می‌شوند و هر دسته با یک bulk_create در تراکنش
+    جداگانه ذخیره می‌شود. ردیف‌های نامعتبر با شماره خط در errors گزارش می‌شوند.
+    اگر خواندن فایل وسط کار خطا دهد، ردیف‌های خوانده‌شده ذخیره و خطا در
+    read_error گزارش می‌شود.
+    """
+    result = RosterImportResult()
+    started = time.perf_counter()
+    class_ids = dict(Class.objects.values_list('name', 'id'))
+
+    def flush(batch):
+        with transaction.atomic():
+            Student.objects.bulk_create(batch, batch_size=batch_size)
+        result.created += len(batch)
+
+    batch = []
+    line = 1
+    try:
+        # خط ۱ سرستون است
+        for line, row in enumerate(rows, start=2):
+            try:
+                batch.append(_clean_row(row, class_ids, create_classes))
+            except ValueError as e:
+                result.errors.append((line, str(e)))
+                continue
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+    except UnicodeDecodeError:
+        result.read_error = f'پس از خط {line} کدگذاری فایل UTF-8 نیست؛ فایل را با کدگذاری UTF-8 ذخیره کنید.'
+    except csv.Error as e:
+        result.read_error = f'پس از خط {line} ساختار CSV نامعتبر است ({e}).'
+    except RosterReadError as e:
+        result.read_error = f'پس از خط {line}: {e}' if line > 1 else str(e)
+    if batch:
+        flush(batch)
+
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,161 @@
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Attendance, AttendanceDailyStat
+
+VALID_STATUSES = {code for code, _ in Attendance.STATUS_CHOICES}
+
+
+def save_attendance(class_schedule, statuses, date=None):
+    """ثبت گروهی حضور و غیاب یک زنگ
+
+    statuses یک دیکشنری {student_id: status} است. رکوردهای امروزِ این زنگ
+    با یک کوئری خوانده می‌شوند و تغییرات با یک bulk_create و یک bulk_update
+    در یک تراکنش نوشته می‌شوند. خروجی: (تعداد ایجادشده، تعداد به‌روزشده)
+    """
+    date = date or timezone.localdate()
+
+    with transaction.atomic():
+        existing = {
+            a.student_id: a
+            for a in Attendance.objects.filter(class_schedule=class_schedule, date=date)
+        }
+
+        to_create = []
+        to_update = []
+        for student_id, status in statuses.items():
+            record = existing.get(student_id)
+            if record is None:
+                to_create.append(Attendance(
+                    student_id=student_id,
+                    class_schedule=class_schedule,
+                    status=status,
+                    date=date,
+                ))
+            elif record.status != status:
+                record.status = status
+                to_update.append(record)
+
+        if to_create:
+            # در صورت ارسال هم‌زمان دو فرم، قید یکتا ردیف تکراری را به به‌روزرسانی تبدیل می‌کند
+            Attendance.objects.bulk_create(
+                to_create,
+                update_conflicts=True,
+                unique_fields=['student', 'class_schedule', 'date'],
+                update_fields=['status'],
+            )
+        if to_update:
+            Attendance.objects.bulk_update(to_update, ['status'])
+        if to_create or to_update:
+            refresh_daily_stats(
+                class_schedule.class_obj_id,
+                date,
+                [a.student_id for a in to_create + to_update],
+            )
+
+    return len(to_create), len(to_update)
+
+
+STAT_COUNTS = {
+    'present': Count('id', filter=Q(status='P')),
+    'absent': Count('id', filter=Q(status='A')),
+    'late': Count('id', filter=Q(status='L')),
+}
+
+
+def refresh_daily_stats(class_obj_id, date, student_ids, create_missing=True):
+    """به‌روزرسانی خلاصه روزانه فقط برای دانش‌آموزان تغییرکرده
+
+    شمارش‌ها از روی رکوردهای همان روز و همان کلاس دوباره محاسبه و با یک
+    upsert نوشته می‌شوند، پس ثبت هم‌زمان دو زنگ شمارش را خراب نمی‌کند.
+    با create_missing=False فقط ردیف‌های موجود به‌روز می‌شوند (برای حذف‌ها).
+    """
+    refresh_stats_for(
+        ((class_obj_id, date, student_id) for student_id in student_ids),
+        create_missing=create_missing,
+    )
+
+
+def refresh_stats_for(keys, create_missing=True):
+    """به‌روزرسانی خلاصه روزانه برای مجموعه‌ای از (کلاس، تاریخ، دانش‌آموز)
+
+    تعداد کوئری‌ها به تعداد کلیدها بستگی ندارد؛ حذف آبشاری یک سال سابقه
+    هم با یک شمارش گروه‌بندی‌شده و یک upsert به‌روز می‌شود.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    class_ids = {class_obj_id for class_obj_id, _, _ in keys}
+    dates = {date for _, date, _ in keys}
+    student_ids = {student_id for _, _, student_id in keys}
+
+    if not create_missing:
+        keys &= set(
+            AttendanceDailyStat.objects.filter(
+                class_obj_id__in=class_ids, date__in=dates, student_id__in=student_ids
+            ).values_list('class_obj_id', 'date', 'student_id')
+        )
+        if not keys:
+            return
+
+    rows = (
+        Attendance.objects.filter(
+            class_schedule__class_obj_id__in=class_ids,
+            date__in=dates,
+            student_id__in=student_ids,
+        )
+        .values('class_schedule__class_obj_id', 'date', 'student_id')
+        .annotate(**STAT_COUNTS)
+        .order_by()
+    )
+    counts = {(row['class_schedule__class_obj_id'], row['date'], row['student_id']): row for row in rows}
+    empty = {'present': 0, 'absent': 0, 'late': 0}
+    stats = []
+    for key in keys:
+        class_obj_id, date, student_id = key
+        row = counts.get(key, empty)
+        stats.append(AttendanceDailyStat(
+            student_id=student_id,
+            class_obj_id=class_obj_id,
+            date=date,
+            present=row['present'],
+            absent=row['absent'],
+            late=row['late'],
+        ))
+    AttendanceDailyStat.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=['student', 'class_obj', 'date'],
+        update_fields=['present', 'absent', 'late'],
+    )
+
+
+def rebuild_daily_stats(batch_size=2000):
+    """ساخت دوباره کل جدول خلاصه روزانه از روی رکوردهای حضور و غیاب"""
+    rows = (
+        Attendance.objects.values('student_id', 'class_schedule__class_obj_id', 'date')
+        .annotate(**STAT_COUNTS)
+        .order_by()
+    )
+    total = 0
+    with transaction.atomic():
+        AttendanceDailyStat.objects.all().delete()
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(AttendanceDailyStat(
+                student_id=row['student_id'],
+                class_obj_id=row['class_schedule__class_obj_id'],
+                date=row['date'],
+                present=row['present'],
+                absent=row['absent'],
+                late=row['late'],
+            ))
+            if len(batch) >= batch_size:
+                AttendanceDailyStat.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            AttendanceDailyStat.objects.bulk_create(batch)
+            total += len(batch)
+    return total
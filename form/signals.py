@@ -0,0 +1,73 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .bells import invalidate_bell_table
+from .models import Attendance, ClassSchedule, Schedule
+from .services import refresh_stats_for
+
+
+@receiver([post_save, post_delete], sender=Schedule)
+def schedule_changed(sender, **kwargs):
+    """باطل کردن جدول زنگ‌ها پس از تغییر زنگ‌ها"""
+    invalidate_bell_table()
+
+
+@receiver(pre_save, sender=Attendance)
+def attendance_before_save(sender, instance, raw=False, **kwargs):
+    """نگه داشتن کلید قبلی رکورد ویرایش‌شده تا اگر تاریخ، دانش‌آموز یا زنگ عوض شد خلاصه قبلی هم اصلاح شود"""
+    instance._previous_stat_key = None
+    if not raw and not instance._state.adding:
+        instance._previous_stat_key = (
+            Attendance.objects.filter(pk=instance.pk)
+            .values_list('class_schedule__class_obj_id', 'date', 'student_id')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Attendance)
+def attendance_saved(sender, instance, raw=False, **kwargs):
+    """به‌روزرسانی خلاصه روزانه پس از ویرایش تکی (مثلاً از پنل ادمین)"""
+    if raw:
+        return
+    keys = {(instance.class_schedule.class_obj_id, instance.date, instance.student_id)}
+    previous = getattr(instance, '_previous_stat_key', None)
+    if previous is not None:
+        keys.add(previous)
+    refresh_stats_for(keys)
+
+
+# کلیدهای رکوردهای در حال حذف روی شیء آغازگر حذف (origin) جمع می‌شوند تا
+# حذف گروهی یا آبشاری (مثلاً حذف یک ClassSchedule) یک بار پردازش شود
+_PENDING_ATTR = '_attendance_stat_keys'
+
+
+@receiver(pre_delete, sender=Attendance)
+def attendance_deleting(sender, instance, origin=None, **kwargs):
+    origin = instance if origin is None else origin
+    pending = origin.__dict__.setdefault(_PENDING_ATTR, set())
+    pending.add((instance.class_schedule_id, instance.date, instance.student_id))
+
+
+@receiver(post_delete, sender=Attendance)
+def attendance_deleted(sender, instance, origin=None, **kwargs):
+    """کم کردن رکوردهای حذف‌شده از خلاصه روزانه
+
+    همه رکوردهای یک حذف پیش از اولین post_delete از جدول پاک شده‌اند، پس
+    اولین فراخوانی کل مجموعه را با چند کوئری ثابت به‌روز می‌کند.
+    """
+    origin = instance if origin is None else origin
+    pending = origin.__dict__.pop(_PENDING_ATTR, None)
+    if not pending:
+        return
+    class_ids = dict(
+        ClassSchedule.objects.filter(id__in={schedule_id for schedule_id, _, _ in pending})
+        .values_list('id', 'class_obj_id')
+    )
+    refresh_stats_for(
+        (
+            (class_ids[schedule_id], date, student_id)
+            for schedule_id, date, student_id in pending
+            if schedule_id in class_ids
+        ),
+        create_missing=False,
+    )
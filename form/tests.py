@@ -1,3 +1,486 @@
+import datetime
+import importlib.util
+import io
+import os
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .bells import BellTable, active_schedule_ids, invalidate_bell_table
+from .forms import teacher_choices
+from .models import Attendance, AttendanceDailyStat, Class, ClassSchedule, Schedule, Student
+from .roster import import_roster, read_csv
+from .services import save_attendance
+from .timetable import build_timetable, save_timetable
+
+User = get_user_model()
+
+
+class QueryPlanAssertionsMixin:
+    """بررسی استفاده کوئری از ایندکس با EXPLAIN QUERY PLAN در SQLite"""
+
+    def assertUsesIndex(self, queryset, table=None):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN فقط در SQLite بررسی می‌شود.')
+        table = table or queryset.model._meta.db_table
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = [row[-1] for row in cursor.fetchall()]
+        steps = [step for step in plan if step.split()[1:2] == [table]]
+        self.assertTrue(steps, f'{table} در طرح اجرا نیست: {plan}')
+        for step in steps:
+            self.assertTrue(step.startswith('SEARCH') and 'INDEX' in step, f'اسکن کامل جدول: {plan}')
+
+
+class AttendanceFixtureMixin:
+    """داده‌های پایه: یک کلاس، یک زنگ همیشه‌فعال و یک معلم"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass')
+        cls.class_obj = Class.objects.create(name='101')
+        cls.all_periods = Schedule.objects.create(zeng=5)
+        cls.class_schedule = ClassSchedule.objects.create(
+            class_obj=cls.class_obj,
+            schedule=cls.all_periods,
+            teacher=cls.teacher,
+            day=timezone.now().strftime('%a')[:3],
+            subject='ریاضی',
+            unit='2',
+        )
+
+    def make_students(self, count, class_obj=None):
+        class_obj = class_obj or self.class_obj
+        return Student.objects.bulk_create([
+            Student(class_obj=class_obj, row_number=i, first_name=f'S{i}', last_name='L', father_name='F')
+            for i in range(1, count + 1)
+        ])
+
+
+class SaveAttendanceTests(AttendanceFixtureMixin, TestCase):
+
+    def test_query_count_does_not_grow_with_class_size(self):
+        small = self.make_students(5)
+        large = self.make_students(35, Class.objects.create(name='102'))
+        other_schedule = ClassSchedule.objects.create(
+            class_obj=large[0].class_obj, schedule=self.all_periods,
+            teacher=self.teacher, day=self.class_schedule.day,
+        )
+
+        # SAVEPOINT + SELECT + INSERT + آمار روزانه (SELECT + INSERT) + RELEASE
+        with self.assertNumQueries(6):
+            save_attendance(self.class_schedule, {s.id: 'P' for s in small})
+        with self.assertNumQueries(6):
+            save_attendance(other_schedule, {s.id: 'P' for s in large})
+
+    def test_resubmission_updates_only_changed_rows(self):
+        students = self.make_students(10)
+        save_attendance(self.class_schedule, {s.id: 'P' for s in students})
+
+        statuses = {s.id: 'P' for s in students}
+        statuses[students[0].id] = 'A'
+        statuses[students[1].id] = 'L'
+        # SAVEPOINT + SELECT + UPDATE + آمار روزانه (SELECT + INSERT) + RELEASE
+        with self.assertNumQueries(6):
+            created, updated = save_attendance(self.class_schedule, statuses)
+
+        self.assertEqual((created, updated), (0, 2))
+        self.assertEqual(Attendance.objects.filter(class_schedule=self.class_schedule).count(), 10)
+        self.assertEqual(Attendance.objects.get(student=students[0]).status, 'A')
+
+    def test_resubmission_is_idempotent(self):
+        students = self.make_students(3)
+        statuses = {s.id: 'A' for s in students}
+        save_attendance(self.class_schedule, statuses)
+        self.assertEqual(save_attendance(self.class_schedule, statuses), (0, 0))
+        self.assertEqual(Attendance.objects.count(), 3)
+
+    def test_explicit_date_is_kept(self):
+        students = self.make_students(2)
+        date = datetime.date(2026, 1, 1)
+        save_attendance(self.class_schedule, {s.id: 'A' for s in students}, date=date)
+
+        self.assertEqual(set(Attendance.objects.values_list('date', flat=True)), {date})
+        stat = AttendanceDailyStat.objects.get(student=students[0], date=date)
+        self.assertEqual((stat.present, stat.absent, stat.late), (0, 1, 0))
+
+
+class AttendanceViewTests(AttendanceFixtureMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username='teacher', password='pass')
+
+    def test_teacher_choices_follow_user_changes(self):
+        self.assertIn((self.teacher.pk, 'teacher'), teacher_choices())
+        with self.assertNumQueries(0):
+            teacher_choices()
+
+        self.teacher.first_name, self.teacher.last_name = 'مریم', 'احمدی'
+        self.teacher.save()
+        self.assertIn((self.teacher.pk, 'مریم احمدی'), teacher_choices())
+
+    def test_login_does_not_invalidate_teacher_choices(self):
+        teacher_choices()
+        self.client.login(username='teacher', password='pass')
+        with self.assertNumQueries(0):
+            teacher_choices()
+
+    def test_post_saves_every_student(self):
+        students = self.make_students(4)
+        data = {f'status_{s.id}': 'A' for s in students}
+        url = reverse('form:attendance', args=[self.class_schedule.id])
+
+        response = self.client.post(url, data)
+
+        self.assertRedirects(response, url)
+        self.assertEqual(
+            list(Attendance.objects.values_list('status', flat=True).distinct()), ['A']
+        )
+        self.assertEqual(Attendance.objects.count(), 4)
+
+
+class BuildTimetableTests(AttendanceFixtureMixin, TestCase):
+
+    def test_single_query_and_cell_layout(self):
+        zengs = [Schedule.objects.create(zeng=z) for z in (1, 2, 3)]
+        ClassSchedule.objects.create(
+            class_obj=self.class_obj, schedule=zengs[0], teacher=self.teacher, day='Sat', subject='A'
+        )
+        for part in (1, 2):
+            ClassSchedule.objects.create(
+                class_obj=self.class_obj, schedule=zengs[1], teacher=self.teacher, day='Sun',
+                subject=f'B{part}', is_split=True, split_part=part
+            )
+
+        with self.assertNumQueries(1):
+            timetable = build_timetable(self.class_obj, zengs)
+            self.assertEqual(timetable[0]['periods'][0]['schedule'].teacher, self.teacher)
+
+        self.assertEqual([d['day'] for d in timetable], ['Sat', 'Sun', 'Mon', 'Tue', 'Wed'])
+        sunday = timetable[1]['periods'][1]
+        self.assertTrue(sunday['is_split'])
+        self.assertEqual((sunday['first_half'].subject, sunday['second_half'].subject), ('B1', 'B2'))
+        empty = timetable[2]['periods'][2]
+        self.assertEqual((empty['is_split'], empty['schedule']), (False, None))
+
+
+class SaveTimetableTests(AttendanceFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.zengs = [Schedule.objects.create(zeng=z) for z in (1, 2, 3, 4)]
+
+    def full_week(self, teacher_id, subject='ریاضی'):
+        data = {}
+        for day in ('Sat', 'Sun', 'Mon', 'Tue', 'Wed'):
+            for zeng in self.zengs:
+                data.update({
+                    f'teacher_{day}_{zeng.id}': str(teacher_id),
+                    f'subject_{day}_{zeng.id}': subject,
+                    f'unit_{day}_{zeng.id}': '1',
+                })
+        return data
+
+    def test_first_save_uses_bulk_writes(self):
+        # SELECT teachers + SAVEPOINT + SELECT current + INSERT + RELEASE
+        with self.assertNumQueries(5):
+            warnings = save_timetable(self.class_obj, self.full_week(self.teacher.id), self.zengs)
+        self.assertEqual(warnings, [])
+        self.assertEqual(ClassSchedule.objects.filter(class_obj=self.class_obj, schedule__in=self.zengs).count(), 20)
+
+    def test_resave_updates_rows_in_place(self):
+        save_timetable(self.class_obj, self.full_week(self.teacher.id), self.zengs)
+        ids = set(ClassSchedule.objects.filter(schedule__in=self.zengs).values_list('id', flat=True))
+
+        # SELECT teachers + SAVEPOINT + SELECT current + UPDATE + RELEASE
+        with self.assertNumQueries(5):
+            save_timetable(self.class_obj, self.full_week(self.teacher.id, subject='فیزیک'), self.zengs)
+
+        rows = ClassSchedule.objects.filter(schedule__in=self.zengs)
+        self.assertEqual(set(rows.values_list('id', flat=True)), ids)
+        self.assertEqual(set(rows.values_list('subject', flat=True)), {'فیزیک'})
+
+    def test_split_and_cleared_cells(self):
+        save_timetable(self.class_obj, self.full_week(self.teacher.id), self.zengs)
+        data = self.full_week(self.teacher.id)
+        first, second = self.zengs[0].id, self.zengs[1].id
+        data.update({
+            f'split_Sat_{first}': 'on',
+            f'teacher1_Sat_{first}': str(self.teacher.id), f'subject1_Sat_{first}': 'A', f'unit1_Sat_{first}': '1',
+            f'teacher2_Sat_{first}': str(self.teacher.id), f'subject2_Sat_{first}': 'B', f'unit2_Sat_{first}': '1',
+            f'subject_Sat_{second}': '',
+        })
+
+        warnings = save_timetable(self.class_obj, data, self.zengs)
+
+        self.assertEqual(len(warnings), 1)
+        split_cell = ClassSchedule.objects.filter(day='Sat', schedule_id=first).order_by('split_part')
+        self.assertEqual([(r.is_split, r.split_part, r.subject) for r in split_cell], [(True, 1, 'A'), (True, 2, 'B')])
+        self.assertFalse(ClassSchedule.objects.filter(day='Sat', schedule_id=second).exists())
+
+    def test_unknown_teacher_rolls_back_everything(self):
+        data = self.full_week(self.teacher.id)
+        data[f'teacher_Wed_{self.zengs[-1].id}'] = '999999'
+        with self.assertRaises(ValidationError):
+            save_timetable(self.class_obj, data, self.zengs)
+        self.assertFalse(ClassSchedule.objects.filter(schedule__in=self.zengs).exists())
+
+
+class BellTableTests(TestCase):
+
+    def setUp(self):
+        invalidate_bell_table()
+        t = datetime.time
+        self.first = Schedule.objects.create(zeng=1, start_time=t(8, 0), end_time=t(9, 30))
+        self.second = Schedule.objects.create(zeng=2, start_time=t(9, 45), end_time=t(11, 15))
+        self.all_day = Schedule.objects.create(zeng=5)
+
+    def test_lookup_inside_gaps_and_on_boundaries(self):
+        t = datetime.time
+        self.assertEqual(active_schedule_ids(t(7, 0)), {self.all_day.id})
+        self.assertEqual(active_schedule_ids(t(8, 0)), {self.all_day.id, self.first.id})
+        self.assertEqual(active_schedule_ids(t(9, 0)), {self.all_day.id, self.first.id})
+        self.assertEqual(active_schedule_ids(t(9, 30)), {self.all_day.id, self.first.id})
+        self.assertEqual(active_schedule_ids(t(9, 40)), {self.all_day.id})
+        self.assertEqual(active_schedule_ids(t(11, 15)), {self.all_day.id, self.second.id})
+        self.assertEqual(active_schedule_ids(t(12, 0)), {self.all_day.id})
+
+    def test_overlapping_periods(self):
+        t = datetime.time
+        table = BellTable([
+            Schedule(id=1, zeng=1, start_time=t(8, 0), end_time=t(10, 0)),
+            Schedule(id=2, zeng=2, start_time=t(9, 0), end_time=t(9, 30)),
+        ])
+        self.assertEqual(table.active_ids(t(9, 15)), {1, 2})
+        self.assertEqual(table.active_ids(t(9, 45)), {1})
+
+    def test_table_is_cached_and_invalidated_on_save(self):
+        t = datetime.time
+        active_schedule_ids(t(12, 0))
+        with self.assertNumQueries(0):
+            active_schedule_ids(t(12, 0))
+
+        third = Schedule.objects.create(zeng=3, start_time=t(11, 30), end_time=t(13, 0))
+        self.assertIn(third.id, active_schedule_ids(t(12, 0)))
+        third.delete()
+        self.assertEqual(active_schedule_ids(t(12, 0)), {self.all_day.id})
+
+
+class HotQueryPlanTests(QueryPlanAssertionsMixin, AttendanceFixtureMixin, TestCase):
+
+    def test_attendance_page_lookup(self):
+        self.assertUsesIndex(
+            Attendance.objects.filter(class_schedule=self.class_schedule, date=timezone.now().date())
+        )
+
+    def test_class_list_lookup(self):
+        self.assertUsesIndex(
+            ClassSchedule.objects.filter(
+                teacher=self.teacher, day='Sat', schedule_id__in=[self.all_periods.id]
+            ).select_related('class_obj', 'schedule')
+        )
+
+    def test_timetable_lookup(self):
+        self.assertUsesIndex(ClassSchedule.objects.filter(class_obj=self.class_obj).order_by('id'))
+
+
+class AttendanceDailyStatTests(AttendanceFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.students = self.make_students(3)
+        self.second_period = ClassSchedule.objects.create(
+            class_obj=self.class_obj, schedule=Schedule.objects.create(zeng=1),
+            teacher=self.teacher, day=self.class_schedule.day,
+        )
+
+    def stats(self):
+        return {
+            s.student_id: (s.present, s.absent, s.late)
+            for s in AttendanceDailyStat.objects.filter(class_obj=self.class_obj)
+        }
+
+    def test_bulk_save_maintains_rollup(self):
+        first, second, third = self.students
+        save_attendance(self.class_schedule, {first.id: 'A', second.id: 'P', third.id: 'L'})
+        save_attendance(self.second_period, {first.id: 'A', second.id: 'A', third.id: 'P'})
+        self.assertEqual(self.stats(), {first.id: (0, 2, 0), second.id: (1, 1, 0), third.id: (1, 0, 1)})
+
+        save_attendance(self.class_schedule, {first.id: 'P', second.id: 'P', third.id: 'L'})
+        self.assertEqual(self.stats()[first.id], (1, 1, 0))
+
+    def test_single_edits_and_deletes_update_rollup(self):
+        save_attendance(self.class_schedule, {s.id: 'P' for s in self.students})
+        record = Attendance.objects.get(student=self.students[0], class_schedule=self.class_schedule)
+        record.status = 'A'
+        record.save()
+        self.assertEqual(self.stats()[self.students[0].id], (0, 1, 0))
+
+        record.delete()
+        self.assertEqual(self.stats()[self.students[0].id], (0, 0, 0))
+
+    def test_moving_a_record_updates_both_days(self):
+        first, second = datetime.date(2026, 10, 1), datetime.date(2026, 10, 2)
+        student = self.students[0]
+        save_attendance(self.class_schedule, {student.id: 'A'}, date=first)
+        record = Attendance.objects.get(student=student)
+
+        record.date = second
+        record.save()
+
+        stats = {
+            s.date: (s.present, s.absent, s.late)
+            for s in AttendanceDailyStat.objects.filter(student=student)
+        }
+        self.assertEqual(stats, {first: (0, 0, 0), second: (0, 1, 0)})
+
+    def test_cascade_delete_refreshes_rollup_in_one_pass(self):
+        for day in range(1, 32):
+            date = datetime.date(2026, 1, day)
+            save_attendance(self.second_period, {s.id: 'A' for s in self.students}, date=date)
+            save_attendance(self.class_schedule, {s.id: 'P' for s in self.students}, date=date)
+
+        # SELECT + DELETE حضورها، SELECT کلاس زنگ‌ها، آمار موجود + شمارش + upsert، DELETE زنگ
+        with self.assertNumQueries(7):
+            self.second_period.delete()
+
+        self.assertEqual(set(self.stats().values()), {(1, 0, 0)})
+        self.assertEqual(AttendanceDailyStat.objects.filter(class_obj=self.class_obj).count(), 31 * 3)
+
+    def test_queryset_delete_updates_rollup(self):
+        save_attendance(self.class_schedule, {s.id: 'A' for s in self.students})
+        save_attendance(self.second_period, {s.id: 'L' for s in self.students})
+
+        Attendance.objects.filter(class_schedule=self.class_schedule).delete()
+        self.assertEqual(set(self.stats().values()), {(0, 0, 1)})
+
+    def test_rebuild_command_matches_incremental_rollup(self):
+        save_attendance(self.class_schedule, {s.id: 'A' for s in self.students})
+        save_attendance(self.second_period, {s.id: 'L' for s in self.students})
+        expected = self.stats()
+
+        AttendanceDailyStat.objects.all().delete()
+        call_command('rebuild_attendance_stats', stdout=StringIO())
+
+        self.assertEqual(self.stats(), expected)
+
+
+class ExportAttendanceTests(AttendanceFixtureMixin, TestCase):
+
+    def setUp(self):
+        admin = User.objects.create_superuser(username='admin', password='pass')
+        self.client.force_login(admin)
+        save_attendance(self.class_schedule, {s.id: 'A' for s in self.make_students(3)})
+
+    def test_csv_is_streamed(self):
+        today = timezone.localdate()
+        response = self.client.get(reverse('form:export_attendance'), {'start': today, 'end': today})
+
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn('Absent', lines[1])
+        self.assertIn('101', lines[1])
+
+    @skipUnless(importlib.util.find_spec('openpyxl'), 'openpyxl نصب نیست')
+    def test_xlsx_export(self):
+        response = self.client.get(reverse('form:export_attendance'), {'format': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'PK'))
+
+    def test_invalid_parameters_fall_back_to_defaults(self):
+        response = self.client.get(
+            reverse('form:export_attendance'), {'start': '2024-02-30', 'end': 'x', 'class_id': 'abc'}
+        )
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 4)
+
+    def test_requires_staff(self):
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse('form:export_attendance'))
+        self.assertEqual(response.status_code, 302)
+
+
+class ImportRosterTests(TestCase):
+    HEADER = 'class,row_number,first_name,last_name,father_name\n'
+
+    def setUp(self):
+        self.class_obj = Class.objects.create(name='101')
+
+    def test_large_import_is_batched(self):
+        rows = ''.join(f'101,{i},Name{i},Family{i},Father{i}\n' for i in range(5000))
+        with CaptureQueriesContext(connection) as queries:
+            result = import_roster(read_csv(StringIO(self.HEADER + rows)))
+        # تعداد کوئری‌ها به تعداد دسته‌ها بستگی دارد نه تعداد ردیف‌ها
+        self.assertLess(len(queries), 100)
+        self.assertEqual(result.created, 5000)
+        self.assertEqual(Student.objects.filter(class_obj=self.class_obj).count(), 5000)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        rows = '101,1,Ali,Ahmadi,Reza\n999,2,Sara,Karimi,Hasan\n101,x,Mina,Rahimi,Ali\n101,4,,Moradi,Ali\n'
+        result = import_roster(read_csv(StringIO(self.HEADER + rows)))
+        self.assertEqual(result.created, 1)
+        self.assertEqual([line for line, _ in result.errors], [3, 4, 5])
+
+    def test_non_utf8_file_keeps_imported_rows_and_reports(self):
+        rows = ''.join(f'101,{i},Name{i},Family{i},Father{i}\n' for i in range(2000))
+        data = (self.HEADER + rows).encode('utf-8') + '101,2000,حسن,محمد,رضا\n'.encode('cp1256')
+        result = import_roster(read_csv(io.BytesIO(data)), batch_size=100)
+
+        self.assertIsNotNone(result.read_error)
+        self.assertEqual(result.created, Student.objects.count())
+        self.assertGreater(result.created, 0)
+
+    def test_admin_upload_reports_encoding_error(self):
+        self.client.force_login(User.objects.create_superuser(username='admin', password='pass'))
+        data = (self.HEADER + '101,1,حسن,محمد,رضا\n').encode('cp1256')
+        upload = SimpleUploadedFile('roster.csv', data)
+
+        response = self.client.post(reverse('admin:form_student_import'), {'file': upload}, follow=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('UTF-8', ' '.join(str(m) for m in response.context['messages']))
+
+    @skipUnless(importlib.util.find_spec('openpyxl'), 'openpyxl نصب نیست')
+    def test_admin_upload_reports_corrupt_xlsx(self):
+        self.client.force_login(User.objects.create_superuser(username='admin', password='pass'))
+        upload = SimpleUploadedFile('roster.xlsx', (self.HEADER + '101,1,Ali,Ahmadi,Reza\n').encode('utf-8'))
+
+        response = self.client.post(reverse('admin:form_student_import'), {'file': upload}, follow=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('XLSX', ' '.join(str(m) for m in response.context['messages']))
+        self.assertFalse(Student.objects.exists())
+
+    def test_command_creates_missing_classes(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8', delete=False) as f:
+            f.write(self.HEADER + '102,1,Ali,Ahmadi,Reza\n')
+        self.addCleanup(os.remove, f.name)
+
+        out = StringIO()
+        call_command('import_roster', f.name, '--create-classes', stdout=out)
+
+        self.assertTrue(Student.objects.filter(class_obj__name='102').exists())
+        self.assertIn('1', out.getvalue())
+
+    def test_admin_upload(self):
+        self.client.force_login(User.objects.create_superuser(username='admin', password='pass'))
+        upload = SimpleUploadedFile('roster.csv', (self.HEADER + '101,1,Ali,Ahmadi,Reza\n').encode('utf-8'))
+
+        response = self.client.post(reverse('admin:form_student_import'), {'file': upload})
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Student.objects.count(), 1)
+        self.assertEqual(self.client.get(reverse('admin:form_student_import')).status_code, 200)
@@ -0,0 +1,175 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import ClassSchedule, Schedule
+
+User = get_user_model()
+
+DAYS = [
+    ('Sat', 'شنبه'),
+    ('Sun', 'یک‌شنبه'),
+    ('Mon', 'دوشنبه'),
+    ('Tue', 'سه‌شنبه'),
+    ('Wed', 'چهارشنبه'),
+]
+
+
+def get_zengs():
+    """زنگ‌های قابل برنامه‌ریزی (بدون «همه زنگ‌ها») به ترتیب"""
+    return Schedule.objects.exclude(zeng=5).order_by('zeng')
+
+
+def build_timetable(class_obj, zengs):
+    """ساخت جدول هفتگی یک کلاس با یک کوئری
+
+    همه برنامه‌های کلاس یک‌جا خوانده می‌شوند و در حافظه به ساختار
+    روز ← زنگ ← (کل زنگ | نیمه اول و نیمه دوم) تبدیل می‌شوند.
+    """
+    cells = {}
+    rows = (
+        ClassSchedule.objects.filter(class_obj=class_obj)
+        .select_related('teacher', 'schedule')
+        .order_by('id')
+    )
+    for row in rows:
+        cell = cells.setdefault((row.day, row.schedule_id), {'whole': None, 'halves': {}})
+        if row.is_split:
+            cell['halves'].setdefault(row.split_part, row)
+        elif cell['whole'] is None:
+            cell['whole'] = row
+
+    timetable = []
+    for day, day_name in DAYS:
+        periods = []
+        for zeng in zengs:
+            cell = cells.get((day, zeng.id), {'whole': None, 'halves': {}})
+            if cell['halves']:
+                periods.append({
+                    'zeng': zeng,
+                    'is_split': True,
+                    'first_half': cell['halves'].get(1),
+                    'second_half': cell['halves'].get(2),
+                })
+            else:
+                periods.append({
+                    'zeng': zeng,
+                    'is_split': False,
+                    'schedule': cell['whole'],
+                })
+        timetable.append({'day': day, 'day_name': day_name, 'periods': periods})
+    return timetable
+
+
+def _cell_values(data, prefix, suffix):
+    return tuple(data.get(f'{name}{prefix}_{suffix}') for name in ('teacher', 'subject', 'unit'))
+
+
+def _parse_cells(data, zengs):
+    """تبدیل داده‌های فرم به وضعیت مطلوب هر خانه جدول
+
+    خروجی: (cells, keep, warnings) که cells برای هر (روز، زنگ) مقدار
+    (is_split, {split_part: (teacher_id, subject, unit)}) را دارد و keep
+    نیمه‌هایی است که داده کامل ندارند و باید دست‌نخورده بمانند.
+    """
+    cells = {}
+    keep = set()
+    warnings = []
+    for day, _ in DAYS:
+        for zeng in zengs:
+            suffix = f'{day}_{zeng.id}'
+            is_split = data.get(f'split_{suffix}') == 'on'
+            parts = {}
+            if is_split:
+                for part, label in ((1, 'نیمه اول'), (2, 'نیمه دوم')):
+                    values = _cell_values(data, part, suffix)
+                    if all(values):
+                        parts[part] = values
+                    else:
+                        keep.add((day, zeng.id, part))
+                        warnings.append(f'داده‌های {label} برای {day}، زنگ {zeng.get_zeng_display()} کامل نیست.')
+            else:
+                values = _cell_values(data, '', suffix)
+                if all(values):
+                    parts[0] = values
+                else:
+                    warnings.append(f'داده‌های زنگ غیرتقسیم‌شده برای {day}، زنگ {zeng.get_zeng_display()} کامل نیست.')
+            cells[(day, zeng.id)] = (is_split, parts)
+    return cells, keep, warnings
+
+
+def _load_teachers(cells):
+    """اعتبارسنجی همه معلم‌های فرم با یک کوئری in_bulk"""
+    raw_ids = {values[0] for _, parts in cells.values() for values in parts.values()}
+    if not all(str(raw_id).isdigit() for raw_id in raw_ids):
+        raise ValidationError('شناسه معلم نامعتبر است.')
+    teachers = User.objects.in_bulk({int(raw_id) for raw_id in raw_ids})
+    if len(teachers) != len(raw_ids):
+        raise ValidationError('معلم انتخاب‌شده در سیستم وجود ندارد.')
+    return teachers
+
+
+def save_timetable(class_obj, data, zengs):
+    """ذخیره برنامه هفتگی یک کلاس با کمترین تعداد تغییر
+
+    برنامه فعلی یک بار خوانده می‌شود، با داده‌های فرم مقایسه می‌شود و فقط
+    ردیف‌های لازم در یک تراکنش ایجاد، به‌روز یا حذف می‌شوند. ردیف‌هایی که
+    به‌روز می‌شوند حذف نمی‌شوند، پس حضور و غیاب ثبت‌شده برای آن‌ها باقی می‌ماند.
+    خروجی: فهرست هشدارهای خانه‌های ناقص
+    """
+    cells, keep, warnings = _parse_cells(data, zengs)
+    teachers = _load_teachers(cells)
+
+    with transaction.atomic():
+        existing = ClassSchedule.objects.filter(
+            class_obj=class_obj,
+            schedule_id__in=[zeng.id for zeng in zengs],
+        ).order_by('id')
+
+        seen = set()
+        to_update = []
+        to_delete = []
+        for row in existing:
+            cell = cells.get((row.day, row.schedule_id))
+            if cell is None:
+                continue
+            is_split, parts = cell
+            slot = (row.day, row.schedule_id, row.split_part)
+            if slot in seen or row.is_split != is_split or (row.split_part not in parts and slot not in keep):
+                to_delete.append(row.id)
+                continue
+            seen.add(slot)
+            if slot in keep:
+                continue
+            teacher_id, subject, unit = parts[row.split_part]
+            teacher = teachers[int(teacher_id)]
+            if (row.teacher_id, row.subject, row.unit) != (teacher.id, subject, unit):
+                row.teacher = teacher
+                row.subject = subject
+                row.unit = unit
+                to_update.append(row)
+
+        to_create = [
+            ClassSchedule(
+                class_obj=class_obj,
+                schedule_id=schedule_id,
+                day=day,
+                teacher=teachers[int(teacher_id)],
+                subject=subject,
+                unit=unit,
+                is_split=is_split,
+                split_part=part,
+            )
+            for (day, schedule_id), (is_split, parts) in cells.items()
+            for part, (teacher_id, subject, unit) in parts.items()
+            if (day, schedule_id, part) not in seen
+        ]
+
+        if to_delete:
+            ClassSchedule.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            ClassSchedule.objects.bulk_update(to_update, ['teacher', 'subject', 'unit'])
+        if to_create:
+            ClassSchedule.objects.bulk_create(to_create)
+
+    return warnings
@@ -13,6 +13,8 @@ urlpatterns = [
     path('class_schedule/<int:class_schedule_id>/attendance/', views.attendance, name='attendance'),
     # URL برای مدیریت برنامه هفتگی
     path('weekly_schedule/', views.weekly_schedule, name='weekly_schedule'),
+    # URL برای خروجی CSV/XLSX حضور و غیاب
+    path('attendance/export/', views.export_attendance, name='export_attendance'),
     # URL برای خروج از سیستم
     path('logout/', LogoutView.as_view(next_page='form:login'), name='logout'),
 ]
\ No newline at end of file
@@ -24,6 +24,7 @@ class ContactMessageAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'subject', 'created_at')
     search_fields = ('name', 'email', 'subject')
     list_filter = ('created_at',)
+    readonly_fields = ('created_at',)
 
 @admin.register(ContactInfo)
 class ContactInfoAdmin(admin.ModelAdmin):
@@ -89,13 +90,14 @@ class EducationalResourceAdmin(admin.ModelAdmin):
     list_display = ['title', 'resource_type', 'major', 'grade', 'teacher', 'download_count', 'view_count', 'is_active']
     list_filter = ['resource_type', 'major', 'grade', 'is_active']
     search_fields = ['title', 'description', 'teacher__full_name']
-    readonly_fields = ['download_count', 'view_count', 'created_at', 'updated_at']
+    # حجم و تعداد صفحات پس از آپلود به‌صورت خودکار از روی فایل پر می‌شوند
+    readonly_fields = ['file_size', 'page_count', 'download_count', 'view_count', 'created_at', 'updated_at']
     fieldsets = (
         ('اطلاعات اصلی', {
             'fields': ('title', 'description', 'resource_type', 'major', 'teacher', 'grade')
         }),
         ('فایل‌ها', {
-            'fields': ('file', 'video_url', 'thumbnail', 'file_size', 'duration')
+            'fields': ('file', 'video_url', 'thumbnail', 'file_size', 'page_count', 'duration')
         }),
         ('آمار', {
             'fields': ('download_count', 'view_count', 'created_at', 'updated_at')
@@ -0,0 +1,98 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.caching import bump_version, versioned_key
+from .models import AboutPage, ContactInfo, TeamMember
+
+NAMESPACE = 'site_content'
+SHARED_TIMEOUT = 60 * 60 * 24
+
+_loaders = {}
+_local = {}
+_lock = threading.Lock()
+
+
+def site_content(name):
+    """ثبت تابع سازنده یک محتوای سراسری سایت با نام داده شده"""
+    def decorator(func):
+        _loaders[name] = func
+        return func
+    return decorator
+
+
+def _local_ttl():
+    return getattr(settings, 'SITE_CONTENT_LOCAL_TTL', 5.0)
+
+
+def get_site_content(name):
+    """خواندن محتوای سراسری از کش دو لایه
+
+    لایه اول یک دیکشنری درون پروسه با عمر کوتاه است و لایه دوم کش جنگو با
+    کلید نسخه‌دار که بین پروسه‌ها مشترک است؛ فقط در نبود هر دو، پایگاه داده
+    خوانده می‌شود. مقدار در یک تاپل ذخیره می‌شود تا None هم کش شود.
+    """
+    now = time.monotonic()
+    entry = _local.get(name)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    key = versioned_key(NAMESPACE, name)
+    cached = cache.get(key)
+    if cached is None:
+        cached = (_loaders[name](),)
+        cache.set(key, cached, SHARED_TIMEOUT)
+
+    with _lock:
+        _local[name] = (now + _local_ttl(), cached[0])
+    return cached[0]
+
+
+def invalidate_site_content():
+    """باطل کردن همه محتوای سراسری در این پروسه و کش مشترک
+
+    پروسه‌های دیگر تغییر را حداکثر پس از عمر لایه درون پروسه می‌بینند.
+    """
+    with _lock:
+        _local.clear()
+    bump_version(NAMESPACE)
+
+
+@site_content('about_page')
+def load_about_page():
+    about_page = AboutPage.objects.first()
+    if about_page is None:
+        return {'about_page': None, 'stats': []}
+    return {
+        'about_page': about_page,
+        'stats': [
+            {'icon': about_page.stat_store_icon, 'number': about_page.stat_store_number, 'label': about_page.stat_store_label},
+            {'icon': about_page.stat_users_icon, 'number': about_page.stat_users_number, 'label': about_page.stat_users_label},
+            {'icon': about_page.stat_rating_icon, 'number': about_page.stat_rating_number, 'label': about_page.stat_rating_label},
+        ],
+    }
+
+
+@site_content('team_members')
+def load_team_members():
+    return [
+        {
+            'name': member.name,
+            'role': member.role,
+            'bio': member.bio,
+            'image': member.image.url if member.image else None,
+            'social': [
+                {'platform': 'linkedin', 'url': member.linkedin_url} if member.linkedin_url else None,
+                {'platform': 'twitter', 'url': member.twitter_url} if member.twitter_url else None,
+                {'platform': 'github', 'url': member.github_url} if member.github_url else None,
+                {'platform': 'instagram', 'url': member.instagram_url} if member.instagram_url else None,
+            ]
+        } for member in TeamMember.objects.all()
+    ]
+
+
+@site_content('contact_info')
+def load_contact_info():
+    return ContactInfo.objects.first()
@@ -0,0 +1,123 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _file_etag(size, mtime):
+    return quote_etag(f'{size:x}-{int(mtime):x}')
+
+
+def parse_range(header, size):
+    """تبدیل هدر Range به (start, end)؛ None یعنی فایل کامل، ValueError یعنی بازه نامعتبر
+
+    فقط یک بازه پشتیبانی می‌شود؛ درخواست چندبازه‌ای با فایل کامل پاسخ داده می‌شود.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N یعنی N بایت آخر
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _read_range(file, start, length):
+    try:
+        file.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _offload_response(field_file, content_type, filename):
+    """واگذاری ارسال فایل به پراکسی جلویی (nginx یا Apache)"""
+    mode = getattr(settings, 'RESOURCE_DELIVERY_MODE', 'django')
+    response = HttpResponse(content_type=content_type)
+    # مقدار هدر باید ASCII باشد؛ در غیر این صورت جنگو آن را MIME-encode می‌کند
+    # و پراکسی نام‌های فارسی را پیدا نمی‌کند. nginx و mod_xsendfile مسیر را decode می‌کنند.
+    if mode == 'x-accel':
+        prefix = getattr(settings, 'RESOURCE_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = quote(prefix + field_file.name)
+    else:
+        response['X-Sendfile'] = quote(field_file.path)
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+def serve_file(request, field_file):
+    """ارسال فایل بدون بارگذاری کامل در حافظه
+
+    از ETag و Last-Modified برای درخواست‌های شرطی، از Range برای ادامه
+    دانلود و در حالت RESOURCE_DELIVERY_MODE=x-accel یا x-sendfile از پراکسی
+    جلویی برای ارسال خود فایل استفاده می‌کند.
+    """
+    filename = os.path.basename(field_file.name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    if getattr(settings, 'RESOURCE_DELIVERY_MODE', 'django') in ('x-accel', 'x-sendfile'):
+        return _offload_response(field_file, content_type, filename)
+
+    try:
+        path = field_file.path
+    except NotImplementedError:
+        # فضای ذخیره‌سازی غیرمحلی: ارسال جریانی بدون هدرهای شرطی
+        return FileResponse(field_file.open('rb'), as_attachment=True, filename=filename, content_type=content_type)
+
+    stat = os.stat(path)
+    etag = _file_etag(stat.st_size, stat.st_mtime)
+    last_modified = http_date(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        byte_range = None
+        if_range = request.headers.get('If-Range')
+        if if_range is None or if_range in (etag, last_modified):
+            try:
+                byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{stat.st_size}'
+
+        if response is None and byte_range is not None:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _read_range(open(path, 'rb'), start, length), status=206, content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = str(length)
+            response['Content-Disposition'] = content_disposition_header(True, filename)
+        elif response is None:
+            # FileResponse با فایل واقعی، wsgi.file_wrapper و در نتیجه sendfile را فعال می‌کند
+            response = FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type=content_type)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    patch_cache_control(response, private=True, max_age=getattr(settings, 'RESOURCE_CACHE_MAX_AGE', 3600))
+    return response
@@ -1,6 +1,14 @@
 from django import forms
+
+from core.caching import CachedChoices
 from .models import ContactMessage, EducationalResource, Major
 
+major_choices = CachedChoices(
+    'major_choices',
+    lambda: Major.objects.order_by('pk').values_list('pk', 'title'),
+    models=[Major],
+)
+
 
 # ---------- فرم پیام تماس ----------
 class ContactMessageForm(forms.ModelForm):
@@ -58,6 +66,5 @@ class ResourceFilterForm(forms.Form):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # بارگذاری رشته‌ها از دیتابیس
-        major_choices = [('all', 'همه رشته‌ها')] + [(major.id, major.title) for major in Major.objects.all()]
-        self.fields['major'].choices = major_choices
+        # گزینه‌های رشته از حافظه پروسه خوانده می‌شوند
+        self.fields['major'].choices = [('all', 'همه رشته‌ها')] + major_choices()
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from index.spool import drain_contact_spool
+
+
+class Command(BaseCommand):
+    help = "انتقال دسته‌ای پیام‌های تماس از صف محلی به پایگاه داده"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help="اجرای پیوسته با این فاصله (ثانیه)؛ صفر یعنی یک بار اجرا",
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            total = drain_contact_spool(batch_size=options['batch_size'])
+            if total or not interval:
+                self.stdout.write(self.style.SUCCESS(f"{total} پیام تماس ذخیره شد."))
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from index.metadata import update_resource_metadata
+from index.models import EducationalResource
+
+
+class Command(BaseCommand):
+    help = "استخراج حجم، تعداد صفحات و مدت فایل منابع آموزشی موجود"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing-only', action='store_true',
+            help="فقط منابعی که حجم فایلشان ثبت نشده است",
+        )
+
+    def handle(self, *args, **options):
+        resources = EducationalResource.objects.exclude(Q(file='') | Q(file__isnull=True))
+        if options['missing_only']:
+            resources = resources.filter(file_size__isnull=True)
+
+        updated = 0
+        for resource_id in resources.values_list('pk', flat=True).iterator():
+            if update_resource_metadata(resource_id) is not None:
+                updated += 1
+        self.stdout.write(self.style.SUCCESS(f"فراداده {updated} منبع به‌روزرسانی شد."))
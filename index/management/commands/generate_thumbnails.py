@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import BlogImage
+from core.thumbnails import ensure_variants
+from index.models import EducationalResource, Major, Teacher, Work
+
+SOURCES = (
+    (Major, 'image'),
+    (Work, 'image'),
+    (Teacher, 'image'),
+    (EducationalResource, 'thumbnail'),
+    (BlogImage, 'image'),
+)
+
+
+class Command(BaseCommand):
+    help = "ساخت نسخه‌های WebP برای تصاویری که پیش از این آپلود شده‌اند"
+
+    def handle(self, *args, **options):
+        total = 0
+        for model, field in SOURCES:
+            names = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            for name in names.values_list(field, flat=True).distinct().iterator():
+                try:
+                    ensure_variants(name)
+                except (OSError, ValueError) as exc:
+                    self.stderr.write(f"{name}: {exc}")
+                    continue
+                total += 1
+        self.stdout.write(self.style.SUCCESS(f"{total} تصویر بررسی شد."))
@@ -0,0 +1,154 @@
+import datetime
+import mmap
+import os
+import re
+import struct
+from dataclasses import dataclass
+from typing import Optional
+
+from django.utils import timezone
+
+from core.caching import bump_version
+from core.tasks import media_worker
+from .models import EducationalResource
+
+_PAGES_TREE = re.compile(rb'/Type\s*/Pages(?![A-Za-z])')
+_PAGE_OBJECT = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+_COUNT = re.compile(rb'/Count\s+(\d+)')
+
+# جعبه‌های MP4 که جعبه‌های دیگر را در خود دارند
+_MP4_CONTAINERS = {b'moov', b'trak', b'mdia'}
+
+
+@dataclass
+class FileMetadata:
+    file_size: float
+    page_count: Optional[int] = None
+    duration: Optional[datetime.timedelta] = None
+
+
+def _map(path):
+    """نگاشت فایل در حافظه؛ سیستم‌عامل فقط صفحه‌های خوانده‌شده را بارگذاری می‌کند"""
+    with open(path, 'rb') as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def pdf_page_count(data):
+    """تعداد صفحات PDF از شمارنده /Count ریشه درخت صفحات
+
+    ریشه درخت بزرگ‌ترین /Count را در میان اشیای /Type /Pages دارد. اگر
+    درخت صفحات فشرده (object stream) باشد، اشیای /Type /Page شمرده می‌شوند
+    و در نبود آن‌ها None برگردانده می‌شود.
+    """
+    counts = []
+    for match in _PAGES_TREE.finditer(data):
+        # فقط همان شیء (از obj تا endobj) بررسی می‌شود، نه اشیای کناری مثل /Outlines
+        start = data.rfind(b'obj', max(0, match.start() - 4096), match.start())
+        end = data.find(b'endobj', match.end(), match.end() + 4096)
+        if start == -1 or end == -1:
+            continue
+        counts.extend(int(value) for value in _COUNT.findall(data[start:end]))
+    if counts:
+        return max(counts)
+    pages = sum(1 for _ in _PAGE_OBJECT.finditer(data))
+    return pages or None
+
+
+def mp4_duration(data):
+    """مدت ویدیو/صوت MP4 و MOV از جعبه mvhd بدون خواندن داده‌های رسانه"""
+    def walk(start, end):
+        offset = start
+        while offset + 8 <= end:
+            size, kind = struct.unpack('>I4s', data[offset:offset + 8])
+            header = 8
+            if size == 1:
+                size = struct.unpack('>Q', data[offset + 8:offset + 16])[0]
+                header = 16
+            elif size == 0:
+                size = end - offset
+            if size < header:
+                return None
+            if kind == b'mvhd':
+                body = offset + header
+                version = data[body]
+                if version == 1:
+                    timescale, duration = struct.unpack('>IQ', data[body + 20:body + 32])
+                else:
+                    timescale, duration = struct.unpack('>II', data[body + 12:body + 20])
+                return duration / timescale if timescale else None
+            if kind in _MP4_CONTAINERS:
+                found = walk(offset + header, min(end, offset + size))
+                if found is not None:
+                    return found
+            offset += size
+        return None
+
+    if data[4:8] not in (b'ftyp', b'moov', b'mdat', b'free', b'wide'):
+        return None
+    return walk(0, len(data))
+
+
+def wav_duration(data):
+    """مدت فایل WAV از byte rate سربرگ fmt و اندازه قطعه data"""
+    if data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        return None
+    offset, byte_rate = 12, None
+    while offset + 8 <= len(data):
+        kind, size = struct.unpack('<4sI', data[offset:offset + 8])
+        if kind == b'fmt ':
+            byte_rate = struct.unpack('<I', data[offset + 16:offset + 20])[0]
+        elif kind == b'data':
+            return size / byte_rate if byte_rate else None
+        offset += 8 + size + (size & 1)
+    return None
+
+
+def extract_metadata(path):
+    """استخراج حجم، تعداد صفحات و مدت یک فایل بدون بارگذاری کامل آن در حافظه"""
+    size = os.path.getsize(path)
+    metadata = FileMetadata(file_size=round(size / (1024 * 1024), 2))
+    data = _map(path)
+    if data is None:
+        return metadata
+    with data:
+        try:
+            if data[:5] == b'%PDF-':
+                metadata.page_count = pdf_page_count(data)
+            else:
+                seconds = mp4_duration(data) or wav_duration(data)
+                if seconds:
+                    metadata.duration = datetime.timedelta(seconds=round(seconds))
+        except (struct.error, IndexError, ValueError, OverflowError, RecursionError):
+            # فایل ناقص یا خراب؛ فقط حجم ثبت می‌شود
+            pass
+    return metadata
+
+
+def update_resource_metadata(resource_id):
+    """به‌روزرسانی ستون‌های فراداده یک منبع با یک UPDATE
+
+    مقدار مدت فقط وقتی از فایل به دست آمده باشد جایگزین می‌شود تا مدت
+    واردشده برای ویدیوهای لینک‌دار از بین نرود.
+    """
+    name = EducationalResource.objects.filter(pk=resource_id).values_list('file', flat=True).first()
+    if not name:
+        return None
+    resource = EducationalResource(pk=resource_id, file=name)
+    try:
+        metadata = extract_metadata(resource.file.path)
+    except (FileNotFoundError, NotImplementedError):
+        return None
+
+    values = {'file_size': metadata.file_size, 'page_count': metadata.page_count, 'updated_at': timezone.now()}
+    if metadata.duration is not None:
+        values['duration'] = metadata.duration
+    EducationalResource.objects.filter(pk=resource_id).update(**values)
+    bump_version('resources')
+    return metadata
+
+
+def schedule_metadata(resource):
+    if resource.file:
+        media_worker.submit(update_resource_metadata, resource.pk)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("index", "0004_alter_educationalresource_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="educationalresource",
+            index=models.Index(
+                fields=["is_active", "created_at", "id"],
+                name="index_educa_is_acti_60ae82_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+from core.search import normalize_persian
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS index_resource_fts "
+        "USING fts5(title, description, teacher, tokenize='unicode61 remove_diacritics 2')"
+    )
+    EducationalResource = apps.get_model("index", "EducationalResource")
+    rows = [
+        (
+            resource.pk,
+            normalize_persian(resource.title),
+            normalize_persian(resource.description),
+            normalize_persian(resource.teacher.full_name),
+        )
+        for resource in EducationalResource.objects.filter(
+            is_active=True
+        ).select_related("teacher")
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO index_resource_fts (rowid, title, description, teacher) "
+            "VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS index_resource_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("index", "0005_educationalresource_keyset_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
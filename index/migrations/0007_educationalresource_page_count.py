@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("index", "0006_resource_fts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="educationalresource",
+            name="page_count",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="تعداد صفحات"
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("index", "0007_educationalresource_page_count"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="contactmessage",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -136,6 +136,7 @@ class EducationalResource(models.Model):
     thumbnail = models.ImageField(upload_to='thumbnails/', blank=True, null=True, verbose_name="تصویر شاخص")
     file_size = models.FloatField(blank=True, null=True, verbose_name="حجم فایل (مگابایت)")
     duration = models.DurationField(blank=True, null=True, verbose_name="مدت زمان ویدیو")
+    page_count = models.PositiveIntegerField(blank=True, null=True, verbose_name="تعداد صفحات")
     download_count = models.IntegerField(default=0, verbose_name="تعداد دانلود")
     view_count = models.IntegerField(default=0, verbose_name="تعداد بازدید")
     created_at = models.DateTimeField(default=timezone.now, verbose_name="تاریخ ایجاد")
@@ -149,6 +150,9 @@ class EducationalResource(models.Model):
         verbose_name = "منبع آموزشی"
         verbose_name_plural = "Educational resources"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'created_at', 'id']),
+        ]
 
 
 # ===========================
@@ -250,7 +254,8 @@ class ContactMessage(models.Model):
     phone = models.CharField(max_length=20, blank=True, null=True)
     subject = models.CharField(max_length=255)
     message = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # زمان ارسال از صف تماس منتقل می‌شود، نه زمان تخلیه صف
+    created_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         return f"{self.name} - {self.subject}"
@@ -0,0 +1,39 @@
+import time
+
+from django.core.cache import cache
+
+
+class TokenBucket:
+    """محدودکننده نرخ سطل توکن روی کش مشترک جنگو
+
+    هر کلید حداکثر ``capacity`` توکن دارد و در هر ثانیه ``rate`` توکن
+    دوباره پر می‌شود؛ هر درخواست یک توکن مصرف می‌کند. وضعیت سطل در کش
+    نگه داشته می‌شود تا بین پروسه‌ها مشترک باشد. خواندن و نوشتن اتمیک
+    نیست و در رقابت هم‌زمان ممکن است چند درخواست اضافه عبور کند که برای
+    جلوگیری از سیل درخواست‌ها کافی است.
+    """
+
+    def __init__(self, name, capacity, rate):
+        self.name = name
+        self.capacity = capacity
+        self.rate = rate
+
+    def _key(self, ident):
+        return f'index:ratelimit:{self.name}:{ident}'
+
+    def consume(self, ident, now=None):
+        """مصرف یک توکن؛ False یعنی درخواست باید رد شود"""
+        now = time.time() if now is None else now
+        key = self._key(ident)
+        tokens, stamp = cache.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - stamp) * self.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # پس از پر شدن کامل سطل نیازی به نگه داشتن کلید نیست
+        timeout = max(1, int((self.capacity - tokens) / self.rate) + 1)
+        cache.set(key, (tokens, now), timeout)
+        return allowed
+
+    def reset(self, ident):
+        cache.delete(self._key(ident))
@@ -0,0 +1,64 @@
+from django.db import connection
+
+from core.search import fts_available, fts_search, normalize_persian
+
+FTS_TABLE = 'index_resource_fts'
+
+
+def index_resources(resources):
+    """افزودن منابع فعال به نمایه FTS و حذف بقیه از آن
+
+    منابع باید teacher را همراه داشته باشند (select_related).
+    """
+    resources = list(resources)
+    if not resources or not fts_available():
+        return
+    rows = [
+        (
+            resource.pk,
+            normalize_persian(resource.title),
+            normalize_persian(resource.description),
+            normalize_persian(resource.teacher.full_name),
+        )
+        for resource in resources if resource.is_active
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(resource.pk,) for resource in resources])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description, teacher) VALUES (%s, %s, %s, %s)', rows
+        )
+
+
+def remove_resource(resource_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [resource_id])
+
+
+def search_resources(resources, query):
+    """محدود کردن queryset منابع به نتایج جستجو به ترتیب امتیاز bm25
+
+    وزن عنوان بیشتر از نام استاد و توضیحات است.
+    """
+    return fts_search(resources, FTS_TABLE, query, (10.0, 2.0, 5.0))
+
+
+def rebuild_index(batch_size=500):
+    from .models import EducationalResource
+
+    if not fts_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    total = 0
+    batch = []
+    resources = EducationalResource.objects.filter(is_active=True).select_related('teacher')
+    for resource in resources.iterator(chunk_size=batch_size):
+        batch.append(resource)
+        if len(batch) >= batch_size:
+            index_resources(batch)
+            total += len(batch)
+            batch = []
+    index_resources(batch)
+    return total + len(batch)
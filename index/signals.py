@@ -0,0 +1,82 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.caching import bump_version
+from core.thumbnails import schedule_variants, variants_generated
+from . import search
+from .content import invalidate_site_content
+from .models import (
+    AboutPage, Career, ContactInfo, EducationalResource, Feature, Major, Requirement, ResourceType, Skill,
+    TeamMember, Teacher, Work,
+)
+from .metadata import schedule_metadata
+
+
+@receiver([post_save, post_delete], sender=EducationalResource)
+@receiver([post_save, post_delete], sender=ResourceType)
+@receiver([post_save, post_delete], sender=Teacher)
+def resources_changed(sender, **kwargs):
+    """باطل کردن کش آمار منابع پس از تغییر منابع یا داده‌های وابسته"""
+    bump_version('resources')
+
+
+@receiver([post_save, post_delete], sender=Major)
+@receiver([post_save, post_delete], sender=Feature)
+@receiver([post_save, post_delete], sender=Requirement)
+@receiver([post_save, post_delete], sender=Career)
+@receiver([post_save, post_delete], sender=Skill)
+@receiver([post_save, post_delete], sender=Work)
+def majors_changed(sender, **kwargs):
+    """باطل کردن کش صفحه رشته‌ها پس از تغییر رشته یا زیرمجموعه‌های آن"""
+    bump_version('majors')
+
+
+@receiver(variants_generated)
+def major_images_ready(sender, name, **kwargs):
+    """باطل کردن قطعه‌های کش‌شده صفحه رشته‌ها که آدرس موقت نمای ساخت تنبل را دارند"""
+    if name.startswith(('majors/', 'works/')):
+        bump_version('majors')
+
+
+@receiver([post_save, post_delete], sender=AboutPage)
+@receiver([post_save, post_delete], sender=TeamMember)
+@receiver([post_save, post_delete], sender=ContactInfo)
+def site_content_changed(sender, **kwargs):
+    """باطل کردن کش محتوای سراسری صفحات درباره ما و تماس"""
+    invalidate_site_content()
+
+
+@receiver(post_save, sender=EducationalResource)
+def resource_saved(sender, instance, raw=False, **kwargs):
+    """به‌روزرسانی نمایه جستجوی منبع"""
+    if not raw:
+        search.index_resources([instance])
+
+
+@receiver(post_delete, sender=EducationalResource)
+def resource_deleted(sender, instance, **kwargs):
+    search.remove_resource(instance.pk)
+
+
+@receiver(post_save, sender=Teacher)
+def teacher_saved(sender, instance, raw=False, **kwargs):
+    """نمایه دوباره منابع استاد پس از تغییر نام او"""
+    if not raw:
+        search.index_resources(instance.educationalresource_set.select_related('teacher'))
+
+
+@receiver(post_save, sender=Major)
+@receiver(post_save, sender=Work)
+@receiver(post_save, sender=Teacher)
+def image_saved(sender, instance, raw=False, **kwargs):
+    """ساخت نسخه‌های کوچک تصویر آپلودشده در پس‌زمینه"""
+    if not raw:
+        schedule_variants(instance.image)
+
+
+@receiver(post_save, sender=EducationalResource)
+def resource_files_saved(sender, instance, raw=False, **kwargs):
+    """ساخت نسخه‌های تصویر شاخص و استخراج فراداده فایل در پس‌زمینه"""
+    if not raw:
+        schedule_variants(instance.thumbnail)
+        schedule_metadata(instance)
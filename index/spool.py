@@ -0,0 +1,92 @@
+import json
+import sqlite3
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ContactMessage
+
+CONTACT_FIELDS = ('name', 'email', 'phone', 'subject', 'message')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS contact_spool (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL
+)
+"""
+
+
+def spool_path():
+    return Path(getattr(settings, 'CONTACT_SPOOL_PATH', settings.BASE_DIR / 'var' / 'contact_spool.sqlite3'))
+
+
+def _connect():
+    """اتصال به فایل صف؛ حالت WAL نوشتن هم‌زمان چند پروسه را ارزان می‌کند"""
+    path = spool_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def enqueue_contact_message(data):
+    """افزودن پیام تماس به صف محلی به‌جای نوشتن مستقیم در پایگاه داده اصلی"""
+    values = {field: data.get(field) for field in CONTACT_FIELDS}
+    values['created_at'] = timezone.now().isoformat()
+    payload = json.dumps(values, ensure_ascii=False)
+    conn = _connect()
+    try:
+        conn.execute('INSERT INTO contact_spool (payload) VALUES (?)', (payload,))
+    finally:
+        conn.close()
+
+
+def pending_count():
+    conn = _connect()
+    try:
+        return conn.execute('SELECT COUNT(*) FROM contact_spool').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _message(payload):
+    values = json.loads(payload)
+    created_at = parse_datetime(values.pop('created_at', None) or '')
+    if created_at is not None:
+        values['created_at'] = created_at
+    return ContactMessage(**values)
+
+
+def drain_contact_spool(batch_size=500):
+    """انتقال دسته‌ای پیام‌های صف به جدول ContactMessage
+
+    هر دسته با قفل نوشتن صف خوانده، با یک bulk_create ذخیره و سپس از صف
+    حذف می‌شود؛ اگر ذخیره شکست بخورد ردیف‌ها در صف می‌مانند. تعداد کل
+    پیام‌های منتقل‌شده برگردانده می‌شود.
+    """
+    total = 0
+    conn = _connect()
+    try:
+        while True:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = conn.execute(
+                    'SELECT id, payload FROM contact_spool ORDER BY id LIMIT ?', (batch_size,)
+                ).fetchall()
+                if not rows:
+                    conn.execute('COMMIT')
+                    break
+                ContactMessage.objects.bulk_create(_message(payload) for _, payload in rows)
+                conn.execute('DELETE FROM contact_spool WHERE id <= ?', (rows[-1][0],))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            total += len(rows)
+    finally:
+        conn.close()
+    return total
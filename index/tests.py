@@ -1,3 +1,721 @@
-from django.test import TestCase
+import datetime
+import struct
+import tempfile
+import wave
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+from urllib.parse import unquote
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+from django.urls import reverse
+from django.utils import timezone
+
+from core.caching import CachedChoices, get_version
+from core.pagination import paginate_keyset
+from core.search import normalize_persian
+from core.thumbnails import generate_variants, variant_info, variant_name
+from .forms import ResourceFilterForm
+from .metadata import extract_metadata, mp4_duration, pdf_page_count
+from .content import get_site_content, invalidate_site_content
+from .models import (
+    AboutPage, ContactInfo, ContactMessage, DownloadLog, EducationalResource, Feature, Major, ResourceType, TeamMember, Teacher,
+    ViewLog,
+)
+from .ratelimit import TokenBucket
+from .search import FTS_TABLE, search_resources
+from .spool import drain_contact_spool, enqueue_contact_message, pending_count
+from .tracking import LogBuffer
+from .views import resource_stats
+
+User = get_user_model()
+
+
+class ResourceFixtureMixin:
+    """داده‌های پایه برای تست‌های منابع آموزشی"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='student', password='pass')
+        cls.teacher = Teacher.objects.create(
+            user=User.objects.create_user(username='teacher'), full_name='استاد نمونه', specialty='ریاضی'
+        )
+        cls.major = Major.objects.create(
+            title='شبکه', description='-', image='majors/a.jpg', icon='💻', subtitle='-', introduction='-'
+        )
+        cls.pdf = ResourceType.objects.create(name='PDF', icon='fa-file-pdf')
+        cls.video = ResourceType.objects.create(name='ویدیو', icon='fa-video')
+
+    @classmethod
+    def make_resource(cls, **kwargs):
+        fields = {
+            'title': 'جزوه', 'description': '-', 'resource_type': cls.pdf,
+            'major': cls.major, 'teacher': cls.teacher, 'grade': 10,
+        }
+        fields.update(kwargs)
+        return EducationalResource.objects.create(**fields)
+
+
+@override_settings(RESOURCE_LOG_FLUSH_INTERVAL=0)
+class ResourceTrackingTests(ResourceFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.resource = self.make_resource(file='resources/New_Text_Document.txt')
+
+    def test_counters_use_atomic_update(self):
+        updated_at = self.resource.updated_at
+        self.client.get(reverse('root:download_resource', args=[self.resource.id]))
+        self.client.get(reverse('root:view_resource', args=[self.resource.id]))
+
+        self.resource.refresh_from_db()
+        self.assertEqual((self.resource.download_count, self.resource.view_count), (1, 1))
+        self.assertEqual(self.resource.updated_at, updated_at)
+        self.assertEqual((DownloadLog.objects.count(), ViewLog.objects.count()), (1, 1))
+
+    @override_settings(RESOURCE_LOG_FLUSH_INTERVAL=3600)
+    def test_buffered_logs_are_written_in_one_batch(self):
+        buffer = LogBuffer(ViewLog)
+        for _ in range(5):
+            buffer.add(resource=self.resource, user=self.user, ip_address='127.0.0.1')
+        self.assertFalse(ViewLog.objects.exists())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(buffer.flush(), 5)
+        self.assertEqual(ViewLog.objects.count(), 5)
+
+
+@override_settings(RESOURCE_LOG_FLUSH_INTERVAL=0)
+class ResourceDeliveryTests(ResourceFixtureMixin, TestCase):
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.resource = self.make_resource(file='resources/New_Text_Document.txt')
+        self.url = reverse('root:download_resource', args=[self.resource.id])
+        with self.resource.file.open('rb') as f:
+            self.content = f.read()
+
+    def test_full_download_with_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response['ETag'])
+        self.assertIn('attachment', response['Content-Disposition'])
+
+        cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.resource.refresh_from_db()
+        self.assertEqual(self.resource.download_count, 1)
+
+    def test_range_request_resumes_download(self):
+        size = len(self.content)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 2-{size - 1}/{size}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[2:])
+
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE=f'bytes={size}-').status_code, 416)
+
+    @override_settings(RESOURCE_DELIVERY_MODE='x-accel')
+    def test_proxy_offload(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/resources/New_Text_Document.txt')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(DownloadLog.objects.count(), 1)
+
+    @override_settings(RESOURCE_DELIVERY_MODE='x-accel')
+    def test_proxy_offload_quotes_non_ascii_names(self):
+        resource = self.make_resource(file='resources/جزوه ۱.pdf')
+        response = self.client.get(reverse('root:download_resource', args=[resource.id]))
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/protected-media/resources/%D8%AC%D8%B2%D9%88%D9%87%20%DB%B1.pdf',
+        )
+
+    @override_settings(RESOURCE_DELIVERY_MODE='x-sendfile')
+    def test_sendfile_path_is_quoted(self):
+        resource = self.make_resource(file='resources/جزوه.pdf')
+        response = self.client.get(reverse('root:download_resource', args=[resource.id]))
+        self.assertTrue(response['X-Sendfile'].isascii())
+        self.assertEqual(unquote(response['X-Sendfile']), resource.file.path)
+
+
+class ResourceStatsTests(ResourceFixtureMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.make_resource(download_count=3)
+        self.make_resource(download_count=4, resource_type=self.video)
+        self.make_resource(download_count=5, is_active=False)
+
+    def test_single_query_then_cached(self):
+        active = EducationalResource.objects.filter(is_active=True)
+        expected = {'pdf_count': 1, 'video_count': 1, 'total_downloads': 7, 'total_resources': 2}
+        with self.assertNumQueries(1):
+            self.assertEqual(resource_stats(active, None, None, None), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(resource_stats(active, None, None, None), expected)
+
+    def test_cache_is_per_filter_and_invalidated_on_save(self):
+        active = EducationalResource.objects.filter(is_active=True)
+        resource_stats(active, None, None, None)
+        self.assertEqual(resource_stats(active.filter(grade=11), None, '11', None)['total_resources'], 0)
+
+        self.make_resource(grade=11)
+        self.assertEqual(resource_stats(active, None, None, None)['total_resources'], 3)
+
+    def test_list_page_renders_stats(self):
+        response = self.client.get(reverse('root:resources_list'))
+        self.assertEqual(response.context['stats']['total_downloads'], 7)
+
+
+class KeysetPaginationTests(ResourceFixtureMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        created_at = timezone.now()
+        # چند منبع با created_at یکسان تا ترتیب id هم بررسی شود
+        self.resources = [self.make_resource(title=f'R{i}', created_at=created_at) for i in range(5)]
+
+    def test_pages_cover_every_row_once(self):
+        seen = []
+        cursor = None
+        while True:
+            page = paginate_keyset(EducationalResource.objects.all(), cursor, page_size=2)
+            seen.extend(r.id for r in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, sorted((r.id for r in self.resources), reverse=True))
+
+    def test_invalid_cursor_returns_first_page(self):
+        page = paginate_keyset(EducationalResource.objects.all(), 'not-a-cursor', page_size=2)
+        self.assertEqual(len(page), 2)
+
+    def test_api_page_size_fields_and_query_count(self):
+        url = reverse('root:api_resources')
+        # اعتبارسنج ETag + یک SELECT با select_related
+        with self.assertNumQueries(2):
+            data = self.client.get(url, {'page_size': 3, 'fields': 'id,teacher,major'}).json()
+        self.assertEqual(len(data['resources']), 3)
+        self.assertEqual(set(data['resources'][0]), {'id', 'teacher', 'major'})
+        self.assertTrue(data['has_next'])
+
+        rest = self.client.get(url, {'page_size': 3, 'cursor': data['next_cursor']}).json()
+        self.assertEqual(len(rest['resources']), 2)
+        self.assertFalse(rest['has_next'])
+
+    @patch('index.views.RESOURCES_PAGE_SIZE', 3)
+    def test_list_page_links_to_next_page(self):
+        response = self.client.get(reverse('root:resources_list'), {'grade': '10'})
+        self.assertEqual(len(response.context['resources']), 3)
+        next_url = response.context['resources_next_url']
+        self.assertIn('grade=10', next_url)
+
+        response = self.client.get(reverse('root:resources_list') + next_url)
+        self.assertEqual(len(response.context['resources']), 2)
+        self.assertIsNone(response.context['resources_next_url'])
+
+
+class PersianNormalizationTests(TestCase):
+
+    def test_letters_digits_and_zwnj(self):
+        self.assertEqual(normalize_persian('كتاب علي'), 'کتاب علی')
+        self.assertEqual(normalize_persian('پایه ۱۲ و ١٠'), 'پایه 12 و 10')
+        self.assertEqual(normalize_persian('می\u200cشود'), 'می شود')
+        self.assertEqual(normalize_persian('کِتاب'), 'کتاب')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 فقط روی SQLite')
+class ResourceSearchTests(ResourceFixtureMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.network = self.make_resource(title='آموزش شبکه های کامپیوتری', description='مقدماتی')
+        self.other = self.make_resource(title='ریاضی', description='کاربرد شبکه در ریاضی')
+
+    def search(self, query):
+        return [resource.id for resource in search_resources(EducationalResource.objects.all(), query)]
+
+    def test_signals_keep_index_in_sync_and_rank_title_first(self):
+        self.assertEqual(self.search('شبکه'), [self.network.id, self.other.id])
+        # ی و ک عربی در عبارت جستجو
+        self.assertEqual(self.search('كامپيوتر'), [self.network.id])
+
+        self.other.delete()
+        self.assertEqual(self.search('شبکه'), [self.network.id])
+
+    def test_inactive_resources_are_not_indexed(self):
+        self.other.is_active = False
+        self.other.save()
+        self.make_resource(title='شبکه غیرفعال', is_active=False)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {FTS_TABLE}')
+            self.assertEqual([row[0] for row in cursor.fetchall()], [self.network.id])
+
+        call_command('rebuild_resource_search', stdout=StringIO())
+        self.assertEqual(self.search('شبکه'), [self.network.id])
+
+    def test_teacher_rename_reindexes_resources(self):
+        self.teacher.full_name = 'دکتر رضایی'
+        self.teacher.save()
+        self.assertEqual(set(self.search('رضایی')), {self.network.id, self.other.id})
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        self.assertEqual(self.search('شبکه'), [])
+
+        call_command('rebuild_resource_search', stdout=StringIO())
+        self.assertEqual(len(self.search('شبکه')), 2)
+
+    def test_list_view_uses_ranked_search(self):
+        response = self.client.get(reverse('root:resources_list'), {'search': 'شبکه'})
+        self.assertEqual([r.id for r in response.context['resources']], [self.network.id, self.other.id])
+
+    def test_list_view_filters_inside_search_and_paginates(self):
+        for number in range(14):
+            self.make_resource(title=f'شبکه {number}')
+        other_major = Major.objects.create(
+            title='برق', description='-', image='majors/b.jpg', icon='⚡', subtitle='-', introduction='-'
+        )
+        electric = self.make_resource(title='شبکه برق', major=other_major, grade=11)
+        url = reverse('root:resources_list')
+
+        response = self.client.get(url, {'search': 'شبکه', 'major': other_major.id})
+        self.assertEqual([r.id for r in response.context['resources']], [electric.id])
+        self.assertEqual(response.context['stats']['total_resources'], 1)
+
+        response = self.client.get(url, {'search': 'شبکه', 'grade': 11})
+        self.assertEqual([r.id for r in response.context['resources']], [electric.id])
+
+        response = self.client.get(url, {'search': 'شبکه'})
+        first_page = [r.id for r in response.context['resources']]
+        self.assertEqual(len(first_page), 12)
+        self.assertEqual(response.context['stats']['total_resources'], 17)
+
+        response = self.client.get(url + response.context['resources_next_url'])
+        second_page = [r.id for r in response.context['resources']]
+        self.assertEqual(len(second_page), 5)
+        self.assertFalse(set(first_page) & set(second_page))
+        self.assertIsNone(response.context['resources_next_url'])
+
+
+class ApiConditionalGetTests(ResourceFixtureMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.resource = self.make_resource()
+        self.url = reverse('root:api_resources')
+
+    def test_unchanged_poll_gets_304_without_serialization(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('max-age=30', first['Cache-Control'])
+
+        # فقط کوئری تجمیعی اعتبارسنج
+        with self.assertNumQueries(1):
+            cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        with self.assertNumQueries(1):
+            again = self.client.get(self.url)
+        self.assertEqual(again.content, first.content)
+
+    def test_changes_produce_new_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        EducationalResource.objects.filter(pk=self.resource.pk).update(download_count=5)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['resources'][0]['download_count'], 5)
+
+        self.make_resource(title='جدید')
+        self.assertNotEqual(self.client.get(self.url)['ETag'], response['ETag'])
+
+    def test_etag_depends_on_query_parameters(self):
+        self.assertNotEqual(
+            self.client.get(self.url)['ETag'],
+            self.client.get(self.url, {'fields': 'id'})['ETag'],
+        )
+
+
+class MajorsCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.majors = [
+            Major.objects.create(
+                title=f'رشته {i}', description='توضیح', image='majors/x.png', icon='💻',
+                subtitle='زیرعنوان', introduction='معرفی',
+            )
+            for i in range(3)
+        ]
+        for major in cls.majors:
+            Feature.objects.create(major=major, text=f'ویژگی {major.pk}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_cache_renders_without_queries(self):
+        url = reverse('root:major_detail', args=[self.majors[1].pk])
+        first = self.client.get(url)
+        self.assertContains(first, 'رشته 1')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).content, first.content)
+
+        # صفحه اصلی رشته‌ها قطعه فهرست را از کش می‌خواند
+        with self.assertNumQueries(5):
+            self.client.get(reverse('root:majors'))
+
+    def test_cold_cache_uses_prefetch(self):
+        # فهرست شناسه‌ها، رشته‌ها + ویژگی‌ها، رشته انتخابی + چهار زیرمجموعه
+        with self.assertNumQueries(8):
+            self.client.get(reverse('root:majors'))
+
+    def test_related_change_invalidates_cache(self):
+        url = reverse('root:majors')
+        self.client.get(url)
+        Feature.objects.create(major=self.majors[0], text='ویژگی تازه')
+        self.assertContains(self.client.get(url), 'ویژگی تازه')
+
+    def test_unknown_major_is_404(self):
+        response = self.client.get(reverse('root:major_detail', args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+
+class SiteContentCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        AboutPage.objects.create(title='درباره ما', subtitle='زیرعنوان', description='توضیحات')
+        TeamMember.objects.create(
+            name='عضو اول', role='مدیر', bio='بیو', image='team_images/a.png',
+            github_url='https://github.com/example',
+        )
+        ContactInfo.objects.create()
+
+    def setUp(self):
+        cache.clear()
+        invalidate_site_content()
+
+    def test_warm_pages_skip_database(self):
+        self.client.get(reverse('root:about'))
+        self.client.get(reverse('root:contact'))
+        with self.assertNumQueries(0):
+            about = self.client.get(reverse('root:about'))
+            self.client.get(reverse('root:contact'))
+        self.assertContains(about, 'عضو اول')
+        self.assertContains(about, 'fa-github')
+        self.assertEqual(len(about.context['stats']), 3)
+
+    @override_settings(SITE_CONTENT_LOCAL_TTL=0)
+    def test_shared_layer_serves_after_local_expiry(self):
+        get_site_content('contact_info')
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(get_site_content('contact_info'))
+
+    def test_signals_invalidate(self):
+        self.client.get(reverse('root:about'))
+        TeamMember.objects.create(name='عضو دوم', role='برنامه‌نویس', bio='بیو', image='team_images/b.png')
+        self.assertContains(self.client.get(reverse('root:about')), 'عضو دوم')
+
+        get_site_content('contact_info')
+        ContactInfo.objects.update(phone='0000')
+        self.assertNotEqual(get_site_content('contact_info').phone, '0000')
+        ContactInfo.objects.first().save()
+        self.assertEqual(get_site_content('contact_info').phone, '0000')
+
+
+class ContactSpoolTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(CONTACT_SPOOL_PATH=Path(tmp.name) / 'spool.sqlite3')
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def post_contact(self, **extra):
+        data = {'name': 'علی', 'email': 'ali@example.com', 'subject': 'سلام', 'message': 'متن پیام'}
+        return self.client.post(reverse('root:contact'), data, **extra)
+
+    def test_submission_is_spooled_then_drained_in_bulk(self):
+        for i in range(3):
+            response = self.post_contact(REMOTE_ADDR=f'10.0.0.{i}')
+            self.assertEqual(response.status_code, 302)
+        self.assertEqual(ContactMessage.objects.count(), 0)
+        self.assertEqual(pending_count(), 3)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(drain_contact_spool(), 3)
+        self.assertEqual(pending_count(), 0)
+        self.assertEqual(ContactMessage.objects.filter(subject='سلام').count(), 3)
+
+    def test_drain_keeps_submission_time(self):
+        sent_at = timezone.now() - datetime.timedelta(hours=2)
+        with patch('django.utils.timezone.now', return_value=sent_at):
+            enqueue_contact_message({'name': 'x', 'email': 'x@example.com', 'subject': 's', 'message': 'm'})
+        drain_contact_spool()
+        self.assertEqual(ContactMessage.objects.get().created_at, sent_at)
+
+    def test_failed_drain_keeps_rows(self):
+        enqueue_contact_message({'name': 'x', 'email': 'x@example.com', 'subject': 's', 'message': 'm'})
+        with patch.object(ContactMessage.objects, 'bulk_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                drain_contact_spool()
+        self.assertEqual(pending_count(), 1)
+
+        out = StringIO()
+        call_command('drain_contact_spool', stdout=out)
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+    @override_settings(CONTACT_RATE_LIMIT_BURST=2)
+    def test_flood_from_one_ip_is_rejected(self):
+        statuses = [self.post_contact(REMOTE_ADDR='10.1.1.1').status_code for _ in range(4)]
+        self.assertEqual(statuses[:2], [302, 302])
+        self.assertEqual(pending_count(), 2)
+        self.assertEqual(self.post_contact(REMOTE_ADDR='10.1.1.2').status_code, 302)
+
+    @override_settings(CONTACT_RATE_LIMIT_BURST=2)
+    def test_rotating_forwarded_for_does_not_bypass_limit(self):
+        statuses = [
+            self.post_contact(REMOTE_ADDR='10.1.1.1', HTTP_X_FORWARDED_FOR=f'192.0.2.{i}').status_code
+            for i in range(4)
+        ]
+        self.assertEqual(statuses, [302, 302, 429, 429])
+
+    @override_settings(CONTACT_RATE_LIMIT_BURST=1, TRUSTED_PROXY_COUNT=1)
+    def test_proxy_appended_address_is_used_behind_proxy(self):
+        proxy = {'REMOTE_ADDR': '127.0.0.1'}
+        self.assertEqual(self.post_contact(HTTP_X_FORWARDED_FOR='1.1.1.1, 10.2.0.1', **proxy).status_code, 302)
+        self.assertEqual(self.post_contact(HTTP_X_FORWARDED_FOR='2.2.2.2, 10.2.0.1', **proxy).status_code, 429)
+        self.assertEqual(self.post_contact(HTTP_X_FORWARDED_FOR='10.2.0.2', **proxy).status_code, 302)
+
+
+class TokenBucketTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_refills_over_time(self):
+        bucket = TokenBucket('test', capacity=2, rate=1)
+        self.assertTrue(bucket.consume('a', now=100))
+        self.assertTrue(bucket.consume('a', now=100))
+        self.assertFalse(bucket.consume('a', now=100.5))
+        self.assertTrue(bucket.consume('a', now=101.6))
+        self.assertTrue(bucket.consume('b', now=100))
+
+
+class CachedChoicesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_major_choices_are_memoized_and_invalidated(self):
+        major = Major.objects.create(
+            title='شبکه', description='-', image='majors/x.png', icon='💻', subtitle='-', introduction='-',
+        )
+        ResourceFilterForm()
+        with self.assertNumQueries(0):
+            choices = ResourceFilterForm().fields['major'].choices
+        self.assertIn((major.pk, 'شبکه'), choices)
+
+        major.title = 'شبکه و نرم‌افزار'
+        major.save()
+        self.assertIn((major.pk, 'شبکه و نرم‌افزار'), ResourceFilterForm().fields['major'].choices)
+
+    def test_choices_expire_without_version_bump(self):
+        calls = []
+        choices = CachedChoices('test_choices', lambda: calls.append(1) or [(1, 'a')], ttl=60)
+        with patch('core.caching.time.monotonic', return_value=1000.0):
+            choices()
+            choices()
+        self.assertEqual(len(calls), 1)
+        with patch('core.caching.time.monotonic', return_value=1061.0):
+            choices()
+        self.assertEqual(len(calls), 2)
+
+
+def make_image_upload(name, width, height, fmt='JPEG'):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), (200, 40, 40)).save(buffer, fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{fmt.lower()}')
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True, THUMBNAIL_WIDTHS=(320, 640, 1024))
+class ThumbnailTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(MEDIA_ROOT=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_major(self, image):
+        return Major.objects.create(
+            title='گرافیک', description='-', image=image, icon='🎨', subtitle='-', introduction='-',
+        )
+
+    def test_upload_generates_webp_variants_without_upscaling(self):
+        major = self.make_major(make_image_upload('big.jpg', 800, 400))
+
+        digest, widths = variant_info(major.image.name)
+        self.assertEqual(widths, [320, 640, 800])
+        with default_storage.open(variant_name(digest, 320)) as variant, Image.open(variant) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (320, 160))
+
+        html = Template('{% load thumbnails %}{% srcset major.image %}').render(Context({'major': major}))
+        self.assertIn(f'/media/{variant_name(digest, 640)} 640w', html)
+        self.assertIn('800w', html)
+
+    def test_manifest_survives_cache_loss(self):
+        major = self.make_major(make_image_upload('kept.jpg', 400, 200))
+        info = variant_info(major.image.name)
+        cache.clear()
+
+        with patch('core.thumbnails._digest') as digest:
+            self.assertEqual(variant_info(major.image.name), info)
+        digest.assert_not_called()
+
+    def test_generation_invalidates_majors_fragments(self):
+        with override_settings(BACKGROUND_TASKS_EAGER=False):
+            major = self.make_major(make_image_upload('late.jpg', 400, 200))
+        version = get_version('majors')
+        generate_variants(major.image.name)
+        self.assertNotEqual(get_version('majors'), version)
+
+    def test_identical_content_shares_variants(self):
+        first = self.make_major(make_image_upload('a.jpg', 400, 400))
+        second = self.make_major(make_image_upload('b.jpg', 400, 400))
+        self.assertNotEqual(first.image.name, second.image.name)
+        self.assertEqual(variant_info(first.image.name), variant_info(second.image.name))
+
+    def test_lazy_view_generates_missing_variants(self):
+        with override_settings(BACKGROUND_TASKS_EAGER=False):
+            major = self.make_major(make_image_upload('lazy.png', 700, 350, 'PNG'))
+        self.assertIsNone(variant_info(major.image.name))
+
+        html = Template('{% load thumbnails %}{% thumbnail_url major.image 320 %}').render(Context({'major': major}))
+        response = self.client.get(html)
+        digest, widths = variant_info(major.image.name)
+        self.assertRedirects(
+            response, default_storage.url(variant_name(digest, 320)), fetch_redirect_response=False
+        )
+        self.assertTrue(default_storage.exists(variant_name(digest, 320)))
+
+    def test_backfill_command(self):
+        with override_settings(BACKGROUND_TASKS_EAGER=False):
+            major = self.make_major(make_image_upload('old.jpg', 500, 500))
+        call_command('generate_thumbnails', stdout=StringIO())
+        self.assertEqual(variant_info(major.image.name)[1], [320, 500])
+
+    def test_lazy_view_returns_404_for_invalid_images(self):
+        default_storage.save('thumbnails/x.jpg', ContentFile(b'not an image'))
+        response = self.client.get(reverse('thumbnail', args=[320, 'thumbnails/x.jpg']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_lazy_view_rejects_unknown_sources(self):
+        self.assertEqual(self.client.get(reverse('thumbnail', args=[320, 'resources/x.pdf'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('thumbnail', args=[333, 'majors/x.png'])).status_code, 404)
+
+
+SAMPLE_PDF = (
+    b'%PDF-1.4\n1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n'
+    b'2 0 obj << /Kids [3 0 R 4 0 R] /Type /Pages /Count 2 >> endobj\n'
+    b'3 0 obj << /Type /Page /Parent 2 0 R >> endobj\n'
+    b'4 0 obj << /Type /Page /Parent 2 0 R >> endobj\n'
+    b'5 0 obj << /Type /Outlines /Count 7 >> endobj\n%%EOF\n'
+)
+
+
+def mp4_bytes(seconds, timescale=600):
+    mvhd_body = struct.pack('>B3xIIII', 0, 0, 0, timescale, seconds * timescale) + bytes(80)
+    mvhd = struct.pack('>I4s', 8 + len(mvhd_body), b'mvhd') + mvhd_body
+    moov = struct.pack('>I4s', 8 + len(mvhd), b'moov') + mvhd
+    ftyp = struct.pack('>I4s', 16, b'ftyp') + b'isom' + bytes(4)
+    mdat = struct.pack('>I4s', 8 + 4096, b'mdat') + bytes(4096)
+    return ftyp + mdat + moov
+
+
+class ResourceMetadataTests(ResourceFixtureMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.media = Path(tmp.name)
+        override = override_settings(MEDIA_ROOT=tmp.name, BACKGROUND_TASKS_EAGER=True)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def write(self, name, content):
+        path = self.media / 'resources' / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(content)
+        return f'resources/{name}'
+
+    def test_parsers(self):
+        self.assertEqual(pdf_page_count(SAMPLE_PDF), 2)
+        self.assertEqual(pdf_page_count(SAMPLE_PDF.replace(b'/Type /Pages /Count 2', b'')), 2)
+        self.assertEqual(mp4_duration(mp4_bytes(95)), 95)
+        self.assertIsNone(mp4_duration(b'not a video file'))
+
+    def test_corrupt_media_keeps_size_only(self):
+        truncated = mp4_bytes(95)
+        truncated = truncated[:truncated.index(b'mvhd') + 12]
+        corrupt_wav = b'RIFF' + bytes(4) + b'WAVEfmt ' + struct.pack('<I', 16) + b'\x01'
+        for name, content in (('short.mp4', truncated), ('short.wav', corrupt_wav)):
+            metadata = extract_metadata(self.media / self.write(name, content))
+            self.assertIsNone(metadata.duration)
+            self.assertIsNotNone(metadata.file_size)
+
+    def test_wav_duration(self):
+        path = self.media / 'tone.wav'
+        with wave.open(str(path), 'wb') as audio:
+            audio.setnchannels(1)
+            audio.setsampwidth(2)
+            audio.setframerate(8000)
+            audio.writeframes(bytes(8000 * 2 * 3))
+        self.assertEqual(extract_metadata(path).duration, datetime.timedelta(seconds=3))
+
+    def test_upload_fills_metadata(self):
+        resource = self.make_resource(file=self.write('notes.pdf', SAMPLE_PDF), file_size=99)
+        resource.refresh_from_db()
+        self.assertEqual(resource.page_count, 2)
+        self.assertEqual(resource.file_size, 0.0)
+
+        video = self.make_resource(
+            file=self.write('clip.mp4', mp4_bytes(125)), duration=datetime.timedelta(minutes=1),
+        )
+        video.refresh_from_db()
+        self.assertEqual(video.duration, datetime.timedelta(seconds=125))
+        self.assertIsNone(video.page_count)
+
+    def test_backfill_command(self):
+        with override_settings(BACKGROUND_TASKS_EAGER=False):
+            resource = self.make_resource(file=self.write('old.pdf', SAMPLE_PDF))
+            self.make_resource(file=self.write('missing.pdf', SAMPLE_PDF))
+        (self.media / 'resources' / 'missing.pdf').unlink()
+
+        out = StringIO()
+        call_command('extract_resource_metadata', '--missing-only', stdout=out)
+        resource.refresh_from_db()
+        self.assertEqual(resource.page_count, 2)
+        self.assertIn('1', out.getvalue())
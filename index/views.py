@@ -1,83 +1,123 @@
+import hashlib
+import json
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
-from django.db.models import Q
+from django.http import Http404, HttpResponse, JsonResponse
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import Coalesce
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-import os
-
-from .models import AboutPage, TeamMember, ContactInfo, Major, EducationalResource, DownloadLog, ViewLog
-from .forms import ContactMessageForm, ResourceFilterForm
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date, quote_etag
+
+from core.caching import get_version, versioned_key
+from core.pagination import paginate_keyset, paginate_offset
+from core.search import fts_available
+from .models import Major, EducationalResource
+from .forms import ContactMessageForm, ResourceFilterForm, major_choices
+from .content import get_site_content
+from .delivery import serve_file
+from .ratelimit import TokenBucket
+from .search import search_resources
+from .spool import enqueue_contact_message
+from .tracking import download_logs, increment_counter, view_logs
+
+RESOURCE_STATS_TIMEOUT = 60
+RESOURCES_PAGE_SIZE = 12
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+API_PAYLOAD_TIMEOUT = 300
+API_MAX_AGE = 30
+MAJORS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def contact_rate_limit():
+    return TokenBucket(
+        'contact',
+        capacity=getattr(settings, 'CONTACT_RATE_LIMIT_BURST', 5),
+        rate=getattr(settings, 'CONTACT_RATE_LIMIT_PER_MINUTE', 5) / 60,
+    )
 
 
 # ---------- صفحه درباره ما ----------
 def about_view(request):
-    about_page = AboutPage.objects.first()
-    team_members = TeamMember.objects.all()
-
+    about = get_site_content('about_page')
     context = {
-        'about_page': about_page,
-        'team_members': [
-            {
-                'name': member.name,
-                'role': member.role,
-                'bio': member.bio,
-                'image': member.image.url if member.image else None,
-                'social': [
-                    {'platform': 'linkedin', 'url': member.linkedin_url} if member.linkedin_url else None,
-                    {'platform': 'twitter', 'url': member.twitter_url} if member.twitter_url else None,
-                    {'platform': 'github', 'url': member.github_url} if member.github_url else None,
-                    {'platform': 'instagram', 'url': member.instagram_url} if member.instagram_url else None,
-                ]
-            } for member in team_members
-        ],
-        'stats': []
+        'about_page': about['about_page'],
+        'team_members': get_site_content('team_members'),
+        'stats': about['stats'],
     }
-
-    if about_page:
-        context['stats'] = [
-            {'icon': about_page.stat_store_icon, 'number': about_page.stat_store_number, 'label': about_page.stat_store_label},
-            {'icon': about_page.stat_users_icon, 'number': about_page.stat_users_number, 'label': about_page.stat_users_label},
-            {'icon': about_page.stat_rating_icon, 'number': about_page.stat_rating_number, 'label': about_page.stat_rating_label},
-        ]
-
     return render(request, 'root/about.html', context)
 
 
 # ---------- صفحه تماس ----------
 def contact_view(request):
+    status = 200
     if request.method == 'POST':
         form = ContactMessageForm(request.POST)
-        if form.is_valid():
-            form.save()
+        if not contact_rate_limit().consume(rate_limit_ip(request)):
+            messages.error(request, "تعداد پیام‌های ارسالی بیش از حد مجاز است. لطفاً کمی بعد دوباره تلاش کنید.")
+            status = 429
+        elif form.is_valid():
+            # پیام در صف محلی ذخیره و با دستور drain_contact_spool به پایگاه داده منتقل می‌شود
+            enqueue_contact_message(form.cleaned_data)
             messages.success(request, "پیام شما با موفقیت ارسال شد!")
             return redirect('root:contact')
     else:
         form = ContactMessageForm()
 
-    contact_info = ContactInfo.objects.first()
+    contact_info = get_site_content('contact_info')
 
-    return render(request, 'root/contact.html', {'form': form, 'contact_info': contact_info})
+    return render(request, 'root/contact.html', {'form': form, 'contact_info': contact_info}, status=status)
 
 
 # ---------- لیست رشته‌ها ----------
 def majors(request):
-    majors = Major.objects.all()
-    selected_major = majors.first()
-    context = {
-        'majors': majors,
-        'selected_major': selected_major,
-    }
-    return render(request, 'root/majors.html', context)
+    return _render_majors(request)
 
 
 # ---------- جزئیات رشته ----------
 def major_detail(request, major_id):
-    majors = Major.objects.all()
-    selected_major = get_object_or_404(Major, id=major_id)
+    return _render_majors(request, major_id)
+
+
+def _render_majors(request, major_id=None):
+    """نمایش صفحه رشته‌ها با کش قطعه‌های قالب
+
+    کوئری‌ها تنبل هستند و فقط وقتی قطعه در کش نباشد اجرا می‌شوند؛ فهرست
+    شناسه رشته‌ها هم کش می‌شود تا بررسی 404 بدون کوئری انجام شود.
+    سیگنال‌های رشته و زیرمجموعه‌های آن نسخه کش را عوض می‌کنند.
+    """
+    key = versioned_key('majors', 'ids')
+    major_ids = cache.get(key)
+    if major_ids is None:
+        major_ids = list(Major.objects.order_by('pk').values_list('pk', flat=True))
+        cache.set(key, major_ids, MAJORS_CACHE_TIMEOUT)
+
+    if major_id is None:
+        major_id = major_ids[0] if major_ids else None
+    elif major_id not in major_ids:
+        raise Http404('رشته یافت نشد.')
+
+    selected_major = None
+    if major_id is not None:
+        selected_major = SimpleLazyObject(
+            lambda: Major.objects.prefetch_related(
+                'requirements', 'careers', 'skills', 'works'
+            ).get(pk=major_id)
+        )
+
     context = {
-        'majors': majors,
+        'majors': Major.objects.prefetch_related('features'),
         'selected_major': selected_major,
+        'selected_major_id': major_id,
+        'majors_version': get_version('majors'),
+        'majors_cache_timeout': MAJORS_CACHE_TIMEOUT,
     }
     return render(request, 'root/majors.html', context)
 
@@ -86,6 +126,7 @@ def major_detail(request, major_id):
 def resources_list(request):
     form = ResourceFilterForm(request.GET or None)
     resources = EducationalResource.objects.filter(is_active=True)
+    ranked = False
 
     if form.is_valid():
         major = form.cleaned_data.get('major')
@@ -96,49 +137,89 @@ def resources_list(request):
             resources = resources.filter(major_id=major)
         if grade and grade != 'all':
             resources = resources.filter(grade=grade)
-        if search:
+        if search and fts_available():
+            # MATCH در همان کوئری فیلترشده اجرا می‌شود تا فیلترها نتایج را کوتاه نکنند
+            resources = search_resources(resources, search)
+            ranked = True
+        elif search:
             resources = resources.filter(
                 Q(title__icontains=search) |
                 Q(description__icontains=search) |
                 Q(teacher__full_name__icontains=search)
             )
 
-    video_resources = resources.filter(resource_type__name='ویدیو')
-    other_resources = resources.exclude(resource_type__name='ویدیو')
+    listed = resources.select_related('resource_type', 'major', 'teacher')
+    # نتایج جستجو به ترتیب امتیاز و با شماره صفحه، بقیه با صفحه‌بندی کلیدی
+    paginate = paginate_offset if ranked else paginate_keyset
+    other_page = paginate(
+        listed.exclude(resource_type__name='ویدیو'), request.GET.get('cursor'), RESOURCES_PAGE_SIZE
+    )
+    video_page = paginate(
+        listed.filter(resource_type__name='ویدیو'), request.GET.get('video_cursor'), RESOURCES_PAGE_SIZE
+    )
 
+    filters = form.cleaned_data if form.is_valid() else {}
     context = {
         'form': form,
-        'resources': other_resources,
-        'video_resources': video_resources,
-        'majors': Major.objects.all(),
-        'stats': {
-            'pdf_count': resources.filter(resource_type__name='PDF').count(),
-            'video_count': video_resources.count(),
-            'total_downloads': sum(resource.download_count for resource in resources),
-            'total_resources': resources.count(),
-        }
+        'resources': other_page,
+        'video_resources': video_page,
+        'resources_next_url': _next_page_url(request, 'cursor', other_page),
+        'video_next_url': _next_page_url(request, 'video_cursor', video_page),
+        'majors': major_choices(),
+        'stats': resource_stats(
+            resources,
+            filters.get('major'), filters.get('grade'), filters.get('search'),
+        )
     }
 
     return render(request, 'root/resources.html', context)
 
 
+def _next_page_url(request, param, page):
+    """آدرس صفحه بعد با حفظ فیلترهای فعلی"""
+    if not page.has_next:
+        return None
+    query = request.GET.copy()
+    query[param] = page.next_cursor
+    return f'?{query.urlencode()}'
+
+
+def resource_stats(resources, *filters):
+    """آمار منابع با یک کوئری تجمیعی، کش‌شده برای هر ترکیب فیلتر
+
+    با ذخیره یا حذف منابع کش باطل می‌شود؛ چون شمارنده دانلود با F() و بدون
+    سیگنال زیاد می‌شود، TTL کوتاه تأخیر نمایش مجموع دانلودها را محدود می‌کند.
+    """
+    key = versioned_key('resources', 'stats', *filters)
+    stats = cache.get(key)
+    if stats is None:
+        stats = resources.aggregate(
+            pdf_count=Count('id', filter=Q(resource_type__name='PDF')),
+            video_count=Count('id', filter=Q(resource_type__name='ویدیو')),
+            total_downloads=Coalesce(Sum('download_count'), 0),
+            total_resources=Count('id'),
+        )
+        cache.set(key, stats, RESOURCE_STATS_TIMEOUT)
+    return stats
+
+
 # ---------- دانلود منبع آموزشی ----------
 @login_required
 def download_resource(request, resource_id):
     resource = get_object_or_404(EducationalResource, id=resource_id, is_active=True)
 
-    resource.download_count += 1
-    resource.save()
+    response = serve_file(request, resource.file) if resource.file else None
 
-    DownloadLog.objects.create(
-        resource=resource,
-        user=request.user,
-        ip_address=get_client_ip(request)
-    )
+    # ادامه دانلود (Range از وسط فایل) و پاسخ 304 دانلود جدید حساب نمی‌شوند
+    if response is None or response.status_code == 200 or response.get('Content-Range', '').startswith('bytes 0-'):
+        increment_counter(resource, 'download_count')
+        download_logs.add(
+            resource=resource,
+            user=request.user,
+            ip_address=get_client_ip(request)
+        )
 
-    if resource.file:
-        response = HttpResponse(resource.file, content_type='application/force-download')
-        response['Content-Disposition'] = f'attachment; filename="{os.path.basename(resource.file.name)}"'
+    if response is not None:
         return response
 
     return JsonResponse({'status': 'success', 'message': 'دانلود با موفقیت ثبت شد'})
@@ -149,10 +230,8 @@ def download_resource(request, resource_id):
 def view_resource(request, resource_id):
     resource = get_object_or_404(EducationalResource, id=resource_id, is_active=True)
 
-    resource.view_count += 1
-    resource.save()
-
-    ViewLog.objects.create(
+    increment_counter(resource, 'view_count')
+    view_logs.add(
         resource=resource,
         user=request.user,
         ip_address=get_client_ip(request)
@@ -167,31 +246,77 @@ def view_resource(request, resource_id):
 
 
 # ---------- API منابع آموزشی ----------
+API_FIELDS = {
+    'id': lambda res: res.id,
+    'title': lambda res: res.title,
+    'description': lambda res: res.description,
+    'resource_type': lambda res: res.resource_type.name,
+    'major': lambda res: res.major.title,
+    'teacher': lambda res: res.teacher.full_name,
+    'grade': lambda res: res.get_grade_display(),
+    'download_count': lambda res: res.download_count,
+    'view_count': lambda res: res.view_count,
+    'created_at': lambda res: res.created_at.strftime('%Y/%m/%d'),
+    'file_size': lambda res: res.file_size,
+    'page_count': lambda res: res.page_count,
+    'duration': lambda res: str(res.duration) if res.duration else None,
+    'thumbnail_url': lambda res: res.thumbnail.url if res.thumbnail else None,
+}
+
+
 def api_resources(request):
-    resources = EducationalResource.objects.filter(is_active=True)
+    """پارامترها: cursor، page_size (حداکثر API_MAX_PAGE_SIZE) و fields (فهرست جداشده با کاما)
+
+    اعتبارسنج پاسخ (ETag و Last-Modified) با یک کوئری تجمیعی ساخته می‌شود؛
+    اگر کلاینت نسخه فعلی را داشته باشد پاسخ 304 بدون ساخت داده برمی‌گردد و
+    در غیر این صورت بدنه JSON از کش خوانده یا ساخته می‌شود.
+    """
+    state = EducationalResource.objects.filter(is_active=True).aggregate(
+        last_updated=Max('updated_at'),
+        total=Count('id'),
+        downloads=Coalesce(Sum('download_count'), 0),
+        views=Coalesce(Sum('view_count'), 0),
+    )
+    # شمارنده‌ها با F() و بدون تغییر updated_at زیاد می‌شوند، پس در ETag هم آمده‌اند
+    validator = f"{state['last_updated']}|{state['total']}|{state['downloads']}|{state['views']}|{request.GET.urlencode()}"
+    etag = quote_etag(hashlib.md5(validator.encode('utf-8')).hexdigest())
+    last_modified = int(state['last_updated'].timestamp()) if state['last_updated'] else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        key = versioned_key('resources', 'api', etag)
+        payload = cache.get(key)
+        if payload is None:
+            payload = json.dumps(_api_payload(request), cls=DjangoJSONEncoder)
+            cache.set(key, payload, API_PAYLOAD_TIMEOUT)
+        response = HttpResponse(payload, content_type='application/json')
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=API_MAX_AGE)
+    return response
+
+
+def _api_payload(request):
+    try:
+        page_size = min(max(int(request.GET.get('page_size', API_PAGE_SIZE)), 1), API_MAX_PAGE_SIZE)
+    except ValueError:
+        page_size = API_PAGE_SIZE
+    fields = [name for name in request.GET.get('fields', '').split(',') if name in API_FIELDS] or list(API_FIELDS)
+
+    resources = EducationalResource.objects.filter(is_active=True).select_related('resource_type', 'major', 'teacher')
+    page = paginate_keyset(resources, request.GET.get('cursor'), page_size)
 
     data = {
         'resources': [
-            {
-                'id': res.id,
-                'title': res.title,
-                'description': res.description,
-                'resource_type': res.resource_type.name,
-                'major': res.major.title,
-                'teacher': res.teacher.full_name,
-                'grade': res.get_grade_display(),
-                'download_count': res.download_count,
-                'view_count': res.view_count,
-                'created_at': res.created_at.strftime('%Y/%m/%d'),
-                'file_size': res.file_size,
-                'duration': str(res.duration) if res.duration else None,
-                'thumbnail_url': res.thumbnail.url if res.thumbnail else None,
-            }
-            for res in resources
-        ]
+            {name: API_FIELDS[name](res) for name in fields}
+            for res in page
+        ],
+        'next_cursor': page.next_cursor,
+        'has_next': page.has_next,
     }
-
-    return JsonResponse(data)
+    return data
 
 
 # ---------- گرفتن IP کاربر ----------
@@ -202,3 +327,19 @@ def get_client_ip(request):
     else:
         ip = request.META.get('REMOTE_ADDR')
     return ip
+
+
+def rate_limit_ip(request):
+    """IP مورد اعتماد برای محدودیت نرخ
+
+    اولین مقدار X-Forwarded-For را خود کاربر می‌فرستد و با عوض کردن آن از
+    محدودیت عبور می‌کند؛ پس فقط آدرسی استفاده می‌شود که پراکسی‌های خود ما
+    ثبت کرده‌اند. با TRUSTED_PROXY_COUNT=n مقدار n-ام از انتهای هدر و بدون
+    پراکسی REMOTE_ADDR برگردانده می‌شود.
+    """
+    hops = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    if hops:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.META.get('REMOTE_ADDR')